@@ -11,5 +11,7 @@ from . import caching
 from . import engine
 from . import exceptions
 from . import logging
+from . import metrics
+from . import rendering
 from . import storage
 from .infrastructure import markdown_transformer
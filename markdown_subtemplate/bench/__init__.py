@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for markdown_subtemplate. Stdlib only, not imported by the library itself.
+"""
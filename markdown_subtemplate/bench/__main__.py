@@ -0,0 +1,57 @@
+"""
+Runs the render pipeline benchmarks:
+
+    python -m markdown_subtemplate.bench --output results.json --baseline baseline.json
+
+Exits with status 1 when a scenario is slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from markdown_subtemplate.bench import suite
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m markdown_subtemplate.bench',
+                                     description="Benchmark the markdown_subtemplate render pipeline.")
+    parser.add_argument('--number', type=int, default=50, help="Operations per timed run.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per scenario, the best one counts.")
+    parser.add_argument('--only', nargs='*', help="Run only these scenarios.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--baseline', help="Compare against results saved earlier.")
+    parser.add_argument('--save-baseline', help="Write the results as the new baseline to this file.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown per scenario before failing, 0.25 = 25%%.")
+    options = parser.parse_args(args)
+
+    # Read first, --save-baseline may point at the same file.
+    baseline = None
+    if options.baseline:
+        with open(options.baseline, 'r', encoding='utf-8') as fin:
+            baseline = json.load(fin)
+
+    results = suite.run_suite(number=options.number, repeat=options.repeat, only=options.only)
+
+    for name, result in results['results'].items():
+        print(f"{name:>32}: {result['seconds_per_op'] * 1_000_000:12,.1f} µs/op")
+
+    for file in (options.output, options.save_baseline):
+        if file:
+            with open(file, 'w', encoding='utf-8') as fout:
+                json.dump(results, fout, indent=2)
+
+    if baseline is None:
+        return 0
+
+    regressions = suite.compare(baseline, results, options.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r.name}: {r.baseline * 1_000_000:,.1f} -> {r.current * 1_000_000:,.1f} µs/op "
+              f"({r.change:+.0%})", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Compares the installed markdown renderers on a folder of templates, timing each one
+and checking its HTML is equivalent to markdown2's (the default renderer):
+
+    python -m markdown_subtemplate.bench.renderers --templates /path/to/templates --repeat 50
+"""
+import argparse
+import html.parser
+import os
+import sys
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from markdown_subtemplate import rendering
+from markdown_subtemplate.exceptions import MarkdownTemplateException
+from markdown_subtemplate.infrastructure import page
+from markdown_subtemplate.rendering import MarkdownRenderer
+from markdown_subtemplate.storage.file_storage import FileStore
+
+RendererResult = namedtuple("RendererResult", "name, seconds, documents, mismatches")
+
+default_template_folder = os.path.join(os.path.dirname(__file__), '..', '..', 'tests', 'templates')
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare markdown renderers on a template folder.")
+    parser.add_argument('--templates', default=os.path.abspath(default_template_folder),
+                        help="Template folder to render, defaults to the repository's test templates.")
+    parser.add_argument('--repeat', type=int, default=20, help="Times to render each document.")
+    parser.add_argument('--strict', action='store_true', help="Exit with an error if any output differs.")
+    options = parser.parse_args(args)
+
+    documents = load_documents(os.path.abspath(options.templates))
+    if not documents:
+        print(f"No templates found in {options.templates}.", file=sys.stderr)
+        return 2
+
+    results = compare_renderers(documents, get_available_renderers(), options.repeat)
+
+    print(f"{len(documents)} documents, {options.repeat} renders each:")
+    baseline = results[0].seconds
+    for result in results:
+        speed = baseline / result.seconds if result.seconds else 0
+        status = 'equivalent' if not result.mismatches else f"differs on: {', '.join(result.mismatches)}"
+        print(f"  {result.name:>16}: {result.seconds * 1000:10,.1f} ms ({speed:5.2f}x)  {status}")
+
+    if options.strict and any(r.mismatches for r in results):
+        return 1
+    return 0
+
+
+def get_available_renderers() -> List[MarkdownRenderer]:
+    renderers: List[MarkdownRenderer] = [rendering.Markdown2Renderer()]
+    for renderer_type in (rendering.CmarkRenderer, rendering.MarkdownItRenderer):
+        try:
+            renderers.append(renderer_type())
+        except MarkdownTemplateException:
+            print(f"Skipping {renderer_type.name}, it is not installed.", file=sys.stderr)
+
+    return renderers
+
+
+def load_documents(template_folder: str) -> Dict[str, str]:
+    """
+    The fully imported markdown of every page in the folder, pages that fail to load are skipped.
+    """
+    original_folder = FileStore.get_template_folder()
+    FileStore.set_template_folder(template_folder)
+    try:
+        documents = {}
+        for template_path in FileStore().get_template_paths(include_shared=False):
+            try:
+                markdown = page.load_markdown_contents(template_path)
+            except MarkdownTemplateException:
+                continue
+
+            markdown = page.get_inline_variables(markdown, {}, None)
+            if markdown:
+                documents[template_path] = markdown
+
+        return documents
+    finally:
+        if original_folder:
+            FileStore.set_template_folder(original_folder)
+        else:
+            FileStore().clear_settings()
+
+
+def compare_renderers(documents: Dict[str, str], renderers: List[MarkdownRenderer],
+                      repeat: int) -> List[RendererResult]:
+    """
+    Times each renderer over all documents, the first renderer's output is the reference.
+    """
+    reference = {}
+    results = []
+    for renderer in renderers:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            output = {path: renderer.render(text, False) for path, text in documents.items()}
+        seconds = time.perf_counter() - t0
+
+        if not reference:
+            reference = {path: normalize_html(html) for path, html in output.items()}
+
+        mismatches = sorted(path for path, html in output.items() if normalize_html(html) != reference[path])
+        results.append(RendererResult(name=renderer.name, seconds=seconds, documents=len(documents),
+                                      mismatches=mismatches))
+
+    return results
+
+
+def normalize_html(text: str) -> List[tuple]:
+    """
+    Tags, sorted attributes, and whitespace collapsed text, so formatting differences
+    between renderers do not count as different output.
+    """
+    normalizer = _HtmlNormalizer()
+    normalizer.feed(text)
+    normalizer.close()
+
+    return normalizer.items
+
+
+class _HtmlNormalizer(html.parser.HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items = []
+
+    def handle_starttag(self, tag, attrs):
+        self.items.append(('start', tag, tuple(sorted(attrs))))
+
+    def handle_startendtag(self, tag, attrs):
+        # <br /> and <br> are the same element.
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self.items.append(('end', tag))
+
+    def handle_data(self, data):
+        text = ' '.join(data.split())
+        if not text:
+            return
+
+        # Adjacent text (e.g. split around an entity) is one item.
+        if self.items and self.items[-1][0] == 'data':
+            self.items[-1] = ('data', self.items[-1][1] + ' ' + text)
+        else:
+            self.items.append(('data', text))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
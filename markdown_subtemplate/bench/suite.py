@@ -0,0 +1,159 @@
+"""
+Benchmark suite for the render pipeline: cold renders, HTML cache hits (with and without
+variables), deep and wide import trees, and large documents. Templates are generated into
+a temporary folder, so results do not depend on any particular site.
+"""
+import os
+import platform
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional
+
+from markdown_subtemplate import caching, logging, __version__
+from markdown_subtemplate.caching import BoundedMemoryCache
+from markdown_subtemplate.infrastructure import page, compiled_template
+from markdown_subtemplate.logging import NullLogger
+from markdown_subtemplate.storage.file_storage import FileStore
+
+# Slow scenarios run number // divisor operations per timed run.
+Scenario = namedtuple("Scenario", "name, setup, run, divisor")
+Regression = namedtuple("Regression", "name, baseline, current, change")
+
+variable_count = 50
+import_depth = 20
+import_width = 200
+large_paragraphs = 500
+
+
+def run_suite(number: int = 50, repeat: int = 5, only: Optional[List[str]] = None) -> Dict:
+    """
+    Runs each scenario repeat times, number operations per run, and keeps the best run.
+    Returns JSON-ready results with the time per operation of each scenario.
+    """
+    folder = tempfile.mkdtemp(prefix='markdown_subtemplate_bench_')
+    original_folder = FileStore.get_template_folder()
+    original_cache = caching.get_cache()
+    original_log = logging.get_log()
+
+    try:
+        logging.set_log(NullLogger())
+        write_templates(folder)
+        FileStore.set_template_folder(folder)
+
+        results = {}
+        for scenario in get_scenarios():
+            if only and scenario.name not in only:
+                continue
+
+            caching.set_cache(BoundedMemoryCache(max_entries=None))
+            compiled_template.clear()
+            scenario.setup()
+
+            ops = max(1, number // scenario.divisor)
+            best = min(__time_run(scenario.run, ops) for _ in range(repeat))
+            results[scenario.name] = {'seconds_per_op': best / ops, 'ops': ops}
+
+        return {
+            'library_version': __version__,
+            'python': platform.python_version(),
+            'number': number,
+            'repeat': repeat,
+            'results': results,
+        }
+    finally:
+        caching.set_cache(original_cache)
+        logging.set_log(original_log)
+        compiled_template.clear()
+        if original_folder:
+            FileStore.set_template_folder(original_folder)
+        else:
+            FileStore().clear_settings()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.25) -> List[Regression]:
+    """
+    Scenarios more than tolerance (0.25 = 25%) slower per operation than the baseline.
+    Scenarios missing from either side are ignored.
+    """
+    regressions = []
+    for name, result in sorted(current.get('results', {}).items()):
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('seconds_per_op'):
+            continue
+
+        change = result['seconds_per_op'] / base['seconds_per_op'] - 1
+        if change > tolerance:
+            regressions.append(Regression(name, base['seconds_per_op'], result['seconds_per_op'], change))
+
+    return regressions
+
+
+def get_scenarios() -> List[Scenario]:
+    page_data = {f'var{n}': f'value {n}' for n in range(variable_count)}
+
+    return [
+        Scenario('cold_render', __noop, lambda: __cold(lambda: page.get_page('site/page.md', {})), 1),
+        Scenario('html_cache_hit', lambda: page.get_page('site/page.md', {}),
+                 lambda: page.get_page('site/page.md', {}), 1),
+        Scenario(f'html_cache_hit_{variable_count}_variables', lambda: page.get_page('site/variables.md', {}),
+                 lambda: page.get_page('site/variables.md', page_data), 1),
+        Scenario(f'deep_imports_{import_depth}', __noop,
+                 lambda: page.load_markdown_contents('site/deep.md'), 1),
+        Scenario(f'wide_imports_{import_width}', __noop,
+                 lambda: page.load_markdown_contents('site/wide.md'), 1),
+        Scenario('large_document_cold_render', __noop,
+                 lambda: __cold(lambda: page.get_page('site/large.md', {})), 10),
+        Scenario('large_document_cache_hit', lambda: page.get_page('site/large.md', {}),
+                 lambda: page.get_page('site/large.md', {}), 1),
+    ]
+
+
+def write_templates(folder: str):
+    shared = os.path.join(folder, '_shared')
+    site = os.path.join(folder, 'site')
+    os.makedirs(shared)
+    os.makedirs(site)
+
+    def write(path: str, text: str):
+        with open(os.path.join(folder, path), 'w', encoding='utf-8') as fout:
+            fout.write(text)
+
+    section = '## Section\n\nSome *text* with a [link](https://example.com) and `code`.\n\n* one\n* two\n* three\n'
+
+    write('_shared/header.md', '# Site header\n\nWelcome to the site.\n')
+    write('_shared/footer.md', 'Contact us at [email](mailto:us@example.com).\n')
+    write('site/page.md', '[IMPORT HEADER]\n\n' + '\n'.join([section] * 10) + '\n[IMPORT FOOTER]\n')
+
+    write('site/variables.md', '\n\n'.join(f'Item $VAR{n}$ is here.' for n in range(variable_count)))
+
+    for n in range(import_depth):
+        next_import = f'\n\n[IMPORT DEEP{n + 1}]' if n + 1 < import_depth else ''
+        write(f'_shared/deep{n}.md', f'Level {n} text.{next_import}')
+    write('site/deep.md', '# Deep\n\n[IMPORT DEEP0]\n')
+
+    for n in range(import_width):
+        write(f'_shared/wide{n}.md', f'Wide import {n}.')
+    write('site/wide.md', '# Wide\n\n' + '\n\n'.join(f'[IMPORT WIDE{n}]' for n in range(import_width)))
+
+    write('site/large.md', '# Large\n\n' + '\n'.join([section] * (large_paragraphs // 5)))
+
+
+def __cold(render: Callable[[], str]):
+    caching.get_cache().clear()
+    compiled_template.clear()
+    render()
+
+
+def __noop():
+    pass
+
+
+def __time_run(run: Callable, number: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(number):
+        run()
+
+    return time.perf_counter() - t0
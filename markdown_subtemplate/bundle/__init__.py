@@ -0,0 +1,7 @@
+"""
+Template bundles: the template folder, and optionally its pre-rendered pages, packed into one
+indexed file that BundleStorage and BundleCache read through mmap. Build one with:
+
+    python -m markdown_subtemplate.bundle TEMPLATE_FOLDER BUNDLE_FILE --html
+"""
+from .bundle_file import BundleFile, normalize_path, write_bundle
@@ -0,0 +1,36 @@
+"""
+Packs a template folder into a bundle file:
+
+    python -m markdown_subtemplate.bundle /path/to/templates templates.bundle --html
+
+Exits with status 1 when a page could not be rendered.
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from markdown_subtemplate.bundle import builder
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m markdown_subtemplate.bundle',
+                                     description="Pack a template folder into a single bundle file.")
+    parser.add_argument('template_folder', help="The folder FileStore would use.")
+    parser.add_argument('bundle_file', help="The bundle to write, replaced if it exists.")
+    parser.add_argument('--html', action='store_true', help="Also store each page rendered to HTML.")
+    options = parser.parse_args(args)
+
+    result = builder.build_bundle(os.path.abspath(options.template_folder), options.bundle_file,
+                                  include_html=options.html)
+
+    print(f"Packed {result.pages:,} pages, {result.shared:,} shared imports, "
+          f"and {result.html_pages:,} rendered pages into {options.bundle_file} ({result.bytes:,} bytes).")
+    for template_path, error in sorted(result.errors.items()):
+        print(f"Could not render {template_path}: {error}", file=sys.stderr)
+
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+from collections import namedtuple
+from typing import Dict
+
+from markdown_subtemplate import storage
+from markdown_subtemplate.caching import get_default_version
+from markdown_subtemplate.infrastructure import warm_up
+from markdown_subtemplate.storage.file_storage import FileStore
+from .bundle_file import normalize_path, write_bundle
+
+BuildResult = namedtuple("BuildResult", "pages, shared, html_pages, errors, bytes")
+
+
+def build_bundle(template_folder: str, bundle_file: str, include_html: bool = False) -> BuildResult:
+    """
+    Packs every markdown file under template_folder into bundle_file. With include_html, each page
+    (not the shared imports) is also rendered and stored with its HTML and markdown cache entries,
+    stamped with the library and markdown2 versions and the renderer.
+    """
+    original_folder = FileStore.get_template_folder()
+    original_storage = storage.get_storage()
+    store = FileStore()
+
+    try:
+        FileStore.set_template_folder(template_folder)
+        storage.set_storage(store)
+
+        entries: Dict[str, Dict[str, str]] = {'page': {}, 'shared': {}, 'html': {}, 'markdown': {}}
+        modified: Dict[str, Dict[str, float]] = {'page': {}, 'shared': {}}
+        errors: Dict[str, str] = {}
+
+        for template_path in store.get_template_paths(include_shared=True):
+            key = normalize_path(template_path)
+            entries['page'][key] = store.get_markdown_text(template_path)
+            modified['page'][key] = store.get_markdown_modified(template_path).timestamp()
+
+            if key.startswith('_shared/'):
+                import_name = key[len('_shared/'):-len('.md')]
+                entries['shared'][import_name] = entries['page'][key]
+                modified['shared'][import_name] = modified['page'][key]
+            elif include_html:
+                path, markdown, _, html, error = warm_up.render_template(template_path)
+                if error:
+                    errors[path] = error
+                    continue
+
+                entries['markdown'][f'markdown: {path}'] = markdown
+                entries['html'][f'html: {path}'] = html
+
+        size = write_bundle(bundle_file, entries, version=get_default_version(), modified=modified)
+    finally:
+        storage.set_storage(original_storage)
+        if original_folder:
+            FileStore.set_template_folder(original_folder)
+        else:
+            store.clear_settings()
+
+    return BuildResult(
+        pages=len(entries['page']) - len(entries['shared']),
+        shared=len(entries['shared']),
+        html_pages=len(entries['html']),
+        errors=errors,
+        bytes=size)
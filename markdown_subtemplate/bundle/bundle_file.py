@@ -0,0 +1,122 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from ..exceptions import ArgumentExpectedException, InvalidOperationException
+
+# Sections of a bundle, each maps a key to a text.
+# page: template path, shared: import name, html / markdown: cache key.
+kinds = ('page', 'shared', 'html', 'markdown')
+
+
+class BundleFile:
+    """
+    Read-only view of a bundle file. The file is mapped into memory and only the index is
+    parsed when it is opened, texts are decoded straight from the mapping the first time
+    they are read and kept after that.
+
+    Layout: header (magic, index offset, index length), the UTF-8 texts back to back,
+    then a JSON index of kind -> key -> [offset, length, modified time or null].
+    """
+    magic = b'MDSTBND1'
+    header_format = struct.Struct('<8sQQ')
+
+    def __init__(self, file_path: str):
+        if not file_path or not file_path.strip():
+            raise ArgumentExpectedException('file_path')
+
+        self.file_path = file_path
+        with open(file_path, 'rb') as fin:
+            self.__map = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_offset, index_length = self.header_format.unpack_from(self.__map, 0)
+        if magic != self.magic:
+            self.__map.close()
+            raise InvalidOperationException(f"{file_path} is not a markdown_subtemplate bundle.")
+
+        index = json.loads(str(memoryview(self.__map)[index_offset:index_offset + index_length], 'utf-8'))
+        self.version: Optional[str] = index.get('version')
+        self.created = datetime.fromtimestamp(index['created'], tz=timezone.utc)
+        self.entries: Dict[str, Dict[str, list]] = {kind: index['entries'].get(kind, {}) for kind in kinds}
+
+        self.__decoded: Dict[Tuple[str, str], str] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        text = self.__decoded.get((kind, key))
+        if text is not None:
+            return text
+
+        entry = self.entries[kind].get(key)
+        if entry is None:
+            return None
+
+        offset, length, _ = entry
+        text = str(memoryview(self.__map)[offset:offset + length], 'utf-8')
+        with self.__lock:
+            self.__decoded[(kind, key)] = text
+
+        return text
+
+    def get_modified(self, kind: str, key: str) -> Optional[datetime]:
+        entry = self.entries[kind].get(key)
+        if entry is None or entry[2] is None:
+            return None
+
+        return datetime.fromtimestamp(entry[2], tz=timezone.utc)
+
+    def keys(self, kind: str) -> List[str]:
+        return sorted(self.entries[kind])
+
+    def close(self):
+        self.__map.close()
+
+
+def normalize_path(template_path: str) -> str:
+    """
+    Bundle key of a template path: lower case with / separators, e.g. home/index.md.
+    """
+    parts = template_path.strip().lower().replace('\\', '/').split('/')
+    return '/'.join(p.strip() for p in parts if p.strip())
+
+
+def write_bundle(file_path: str, entries: Dict[str, Dict[str, str]], version: Optional[str] = None,
+                 modified: Optional[Dict[str, Dict[str, float]]] = None) -> int:
+    """
+    Writes the texts in entries (kind -> key -> text) as a bundle, replacing file_path atomically.
+    modified optionally holds the source modification times (kind -> key -> POSIX time).
+    Returns the size of the bundle in bytes.
+    """
+    unknown = set(entries) - set(kinds)
+    if unknown:
+        raise ArgumentExpectedException(f"entries: unknown kinds {', '.join(sorted(unknown))}")
+
+    modified = modified or {}
+    temp_file = f'{file_path}.{os.getpid()}.tmp'
+    index = {'version': version, 'created': time.time(), 'entries': {}}
+
+    with open(temp_file, 'wb') as fout:
+        fout.write(bytes(BundleFile.header_format.size))
+        offset = BundleFile.header_format.size
+
+        for kind in kinds:
+            section = index['entries'][kind] = {}
+            for key, text in sorted(entries.get(kind, {}).items()):
+                data = (text or '').encode('utf-8')
+                fout.write(data)
+                section[key] = [offset, len(data), modified.get(kind, {}).get(key)]
+                offset += len(data)
+
+        index_data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+        fout.write(index_data)
+
+        fout.seek(0)
+        fout.write(BundleFile.header_format.pack(BundleFile.magic, offset, len(index_data)))
+
+    os.replace(temp_file, file_path)
+    return offset + len(index_data)
@@ -1,18 +1,96 @@
+import contextlib
+import threading
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from .bounded_memory_cache import BoundedMemoryCache
+from .bundle_cache import BundleCache
 from .cache_entry import CacheEntry
+from .cache_version import get_default_version
 from .memory_cache import MemoryCache
+from .shared_memory_cache import SharedMemoryCache
+from .sqlite_cache import SqliteCache
 from .subtemplate_cache import SubtemplateCache
+from .tiered_cache import TieredCache
 from ..exceptions import ArgumentExpectedException
 
 __cache: SubtemplateCache = MemoryCache()
+__namespaces: Dict[str, SubtemplateCache] = {}
+__lock = threading.Lock()
+__current_namespace: ContextVar[Optional[str]] = ContextVar('markdown_subtemplate_cache_namespace', default=None)
 
 
-def set_cache(cache_instance: SubtemplateCache):
+def set_cache(cache_instance: SubtemplateCache, namespace: Optional[str] = None):
+    """
+    Sets the cache used outside of any namespace, or the cache of the given namespace.
+    """
     global __cache
     if not cache_instance or not isinstance(cache_instance, SubtemplateCache):
         raise ArgumentExpectedException('cache_instance')
 
-    __cache = cache_instance
+    if namespace is None:
+        __cache = cache_instance
+        return
+
+    with __lock:
+        __namespaces[__check_namespace(namespace)] = cache_instance
+
+
+def get_cache(namespace: Optional[str] = None) -> SubtemplateCache:
+    """
+    The cache of the given namespace, or the current one (see use_namespace). Namespaces
+    without a cache of their own get a new MemoryCache the first time they are used.
+    """
+    if namespace is None:
+        namespace = __current_namespace.get()
+        if namespace is None:
+            return __cache
+
+    cache = __namespaces.get(namespace)
+    if cache is not None:
+        return cache
+
+    with __lock:
+        return __namespaces.setdefault(__check_namespace(namespace), MemoryCache())
+
+
+@contextlib.contextmanager
+def use_namespace(namespace: Optional[str]) -> Iterator[SubtemplateCache]:
+    """
+    Within the block, pages are cached in the namespace's cache. Works per thread and per asyncio task:
+
+        with caching.use_namespace('tenant-a'):
+            html = engine.get_page('home/index.md', data)
+    """
+    if namespace is not None:
+        __check_namespace(namespace)
+
+    token = __current_namespace.set(namespace)
+    try:
+        yield get_cache()
+    finally:
+        __current_namespace.reset(token)
+
+
+def get_namespace() -> Optional[str]:
+    return __current_namespace.get()
+
+
+def get_namespaces() -> List[str]:
+    with __lock:
+        return sorted(__namespaces)
+
+
+def get_caches() -> List[SubtemplateCache]:
+    """
+    The default cache and those of all namespaces.
+    """
+    with __lock:
+        return [__cache, *__namespaces.values()]
+
 
+def __check_namespace(namespace: str) -> str:
+    if not namespace or not isinstance(namespace, str) or not namespace.strip():
+        raise ArgumentExpectedException('namespace')
 
-def get_cache() -> SubtemplateCache:
-    return __cache
+    return namespace
@@ -0,0 +1,146 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .cache_entry import CacheEntry
+from .subtemplate_cache import SubtemplateCache
+from ..exceptions import ArgumentExpectedException
+
+
+class BoundedMemoryCache(SubtemplateCache):
+    """
+    In-memory cache with a maximum number of entries and/or total size in bytes.
+    The least recently used entries are evicted first, entries older than
+    ttl_seconds (if set) are dropped when they are next read.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 1000, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        if max_entries is not None and max_entries < 1:
+            raise ArgumentExpectedException('max_entries')
+        if max_bytes is not None and max_bytes < 1:
+            raise ArgumentExpectedException('max_bytes')
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ArgumentExpectedException('ttl_seconds')
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # (kind, key) -> (entry, size in bytes, expiration time or None), oldest first.
+        self.entries: 'OrderedDict[Tuple[str, str], Tuple[CacheEntry, int, Optional[float]]]' = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_html(self, key: str) -> CacheEntry:
+        return self.__get('html', key)
+
+    def add_html(self, key: str, name: str, html_contents: str) -> CacheEntry:
+        return self.__add('html', key, name, html_contents)
+
+    def get_markdown(self, key: str) -> CacheEntry:
+        return self.__get('markdown', key)
+
+    def add_markdown(self, key: str, name: str, markdown_contents: str) -> CacheEntry:
+        return self.__add('markdown', key, name, markdown_contents)
+
+    def remove_html(self, key: str) -> bool:
+        with self.lock:
+            return self.__remove(('html', key))
+
+    def remove_markdown(self, key: str) -> bool:
+        with self.lock:
+            return self.__remove(('markdown', key))
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('html', prefix)
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('markdown', prefix)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def count(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                'count': len(self.entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def __get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            item = self.entries.get((kind, key))
+            if item is None:
+                self.misses += 1
+                return None
+
+            entry, size, expires = item
+            if expires is not None and expires <= time.monotonic():
+                self.__remove((kind, key))
+                self.expirations += 1
+                self.misses += 1
+                self.notify_evicted(kind, key)
+                return None
+
+            self.entries.move_to_end((kind, key))
+            self.hits += 1
+
+            return entry
+
+    def __add(self, kind: str, key: str, name: str, contents: str) -> CacheEntry:
+        entry = CacheEntry(key=key, name=name, created=datetime.now(), contents=contents)
+        size = sys.getsizeof(contents) if contents else 0
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+
+        with self.lock:
+            self.__remove((kind, key))
+            self.entries[(kind, key)] = (entry, size, expires)
+            self.total_bytes += size
+            self.__evict()
+
+        return entry
+
+    def __remove(self, cache_key: Tuple[str, str]) -> bool:
+        item = self.entries.pop(cache_key, None)
+        if item is None:
+            return False
+
+        self.total_bytes -= item[1]
+        return True
+
+    def __remove_prefix(self, kind: str, prefix: str) -> int:
+        with self.lock:
+            keys = [k for k in self.entries if k[0] == kind and k[1].startswith(prefix)]
+            for cache_key in keys:
+                self.__remove(cache_key)
+
+        return len(keys)
+
+    def __evict(self):
+        # An entry larger than max_bytes on its own is not kept at all.
+        while self.entries and (
+                (self.max_entries is not None and len(self.entries) > self.max_entries) or
+                (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            (kind, key), (_, size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            self.notify_evicted(kind, key)
@@ -0,0 +1,106 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple, Union
+
+from .cache_entry import CacheEntry
+from .cache_version import get_default_version
+from .subtemplate_cache import SubtemplateCache
+from ..bundle.bundle_file import BundleFile
+
+
+class BundleCache(SubtemplateCache):
+    """
+    Serves the pages pre-rendered into a bundle (built with --html) as cache hits, so a fresh
+    process starts warm. The bundle is read-only, entries added later are kept in memory.
+    Bundled entries written by another library or markdown2 version or renderer are ignored.
+    """
+
+    def __init__(self, bundle: Union[str, BundleFile], version: Optional[str] = None):
+        self.bundle = bundle if isinstance(bundle, BundleFile) else BundleFile(bundle)
+        self.version = version or get_default_version()
+        self.use_bundle = self.bundle.version == self.version
+
+        self.lock = threading.RLock()
+        self.entries: Dict[Tuple[str, str], CacheEntry] = {}
+        # Bundled entries invalidated since the bundle was opened.
+        self.removed: Set[Tuple[str, str]] = set()
+
+    def get_html(self, key: str) -> Optional[CacheEntry]:
+        return self.__get('html', key)
+
+    def add_html(self, key: str, name: str, html_contents: str) -> CacheEntry:
+        return self.__add('html', key, name, html_contents)
+
+    def get_markdown(self, key: str) -> Optional[CacheEntry]:
+        return self.__get('markdown', key)
+
+    def add_markdown(self, key: str, name: str, markdown_contents: str) -> CacheEntry:
+        return self.__add('markdown', key, name, markdown_contents)
+
+    def remove_html(self, key: str) -> bool:
+        return self.__remove('html', key)
+
+    def remove_markdown(self, key: str) -> bool:
+        return self.__remove('markdown', key)
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('html', prefix)
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('markdown', prefix)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.use_bundle = False
+
+    def count(self) -> int:
+        with self.lock:
+            return len(self.entries) + self.__bundled_count()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'count': self.count(), 'bundled': self.__bundled_count(), 'added': len(self.entries)}
+
+    def __get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            entry = self.entries.get((kind, key))
+            if entry is not None or not self.use_bundle or (kind, key) in self.removed:
+                return entry
+
+        contents = self.bundle.get(kind, key)
+        if contents is None:
+            return None
+
+        return CacheEntry(key=key, name=key, created=self.bundle.created, contents=contents)
+
+    def __add(self, kind: str, key: str, name: str, contents: str) -> CacheEntry:
+        entry = CacheEntry(key=key, name=name, created=datetime.now(), contents=contents)
+        with self.lock:
+            self.entries[(kind, key)] = entry
+
+        return entry
+
+    def __remove(self, kind: str, key: str) -> bool:
+        with self.lock:
+            removed = self.entries.pop((kind, key), None) is not None
+            if self.use_bundle and (kind, key) not in self.removed and key in self.bundle.entries[kind]:
+                self.removed.add((kind, key))
+                removed = True
+
+        return removed
+
+    def __remove_prefix(self, kind: str, prefix: str) -> int:
+        with self.lock:
+            keys = {key for k, key in self.entries if k == kind and key.startswith(prefix)}
+            if self.use_bundle:
+                keys.update(key for key in self.bundle.entries[kind] if key.startswith(prefix))
+
+            return sum(1 for key in keys if self.__remove(kind, key))
+
+    def __bundled_count(self) -> int:
+        if not self.use_bundle:
+            return 0
+
+        bundled = {(kind, key) for kind in ('html', 'markdown') for key in self.bundle.entries[kind]}
+        return len(bundled - self.removed - set(self.entries))
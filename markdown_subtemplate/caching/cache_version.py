@@ -0,0 +1,18 @@
+def get_default_version() -> str:
+    """
+    The version persistent caches and bundles stamp their entries with: the library and markdown2
+    versions plus the current renderer (and its markdown2 extras), so entries rendered by another
+    version or renderer are ignored. Set the renderer before creating the cache.
+    """
+    import markdown2
+    from .. import __version__
+    from .. import rendering
+
+    renderer = rendering.get_renderer()
+    version = f"markdown_subtemplate {__version__}, markdown2 {markdown2.__version__}, renderer {renderer.name}"
+
+    extras = getattr(renderer, 'enabled_extras', None)
+    if extras:
+        version += f" ({', '.join(sorted(str(e) for e in extras))})"
+
+    return version
@@ -1,34 +1,69 @@
+import threading
 from datetime import datetime
+from typing import Dict
 
 from .cache_entry import CacheEntry
 from .subtemplate_cache import SubtemplateCache
 
 
 class MemoryCache(SubtemplateCache):
-    markdown_cache = {}
-    html_cache = {}
+    def __init__(self):
+        # Per instance, so each cache (e.g. one per namespace) holds and clears only its own entries.
+        self.markdown_cache: Dict[str, CacheEntry] = {}
+        self.html_cache: Dict[str, CacheEntry] = {}
+        self.lock = threading.RLock()
 
     def get_html(self, key: str) -> CacheEntry:
-        return self.html_cache.get(key)
+        with self.lock:
+            return self.html_cache.get(key)
 
     def add_html(self, key: str, name: str, html_contents: str) -> CacheEntry:
         entry = CacheEntry(key=key, name=name, created=datetime.now(), contents=html_contents)
-        self.html_cache[key] = entry
+        with self.lock:
+            self.html_cache[key] = entry
 
         return entry
 
     def get_markdown(self, key: str) -> CacheEntry:
-        return self.markdown_cache.get(key)
+        with self.lock:
+            return self.markdown_cache.get(key)
 
     def add_markdown(self, key: str, name: str, markdown_contents: str) -> CacheEntry:
         entry = CacheEntry(key=key, name=name, created=datetime.now(), contents=markdown_contents)
-        self.markdown_cache[key] = entry
+        with self.lock:
+            self.markdown_cache[key] = entry
 
         return entry
 
+    def remove_html(self, key: str) -> bool:
+        with self.lock:
+            return self.html_cache.pop(key, None) is not None
+
+    def remove_markdown(self, key: str) -> bool:
+        with self.lock:
+            return self.markdown_cache.pop(key, None) is not None
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        with self.lock:
+            return MemoryCache.__remove_prefix(self.html_cache, prefix)
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        with self.lock:
+            return MemoryCache.__remove_prefix(self.markdown_cache, prefix)
+
     def clear(self):
-        self.markdown_cache.clear()
-        self.html_cache.clear()
+        with self.lock:
+            self.markdown_cache.clear()
+            self.html_cache.clear()
 
     def count(self) -> int:
-        return len(self.markdown_cache) + len(self.html_cache)
+        with self.lock:
+            return len(self.markdown_cache) + len(self.html_cache)
+
+    @staticmethod
+    def __remove_prefix(entries: Dict[str, CacheEntry], prefix: str) -> int:
+        keys = [key for key in entries if key.startswith(prefix)]
+        for key in keys:
+            del entries[key]
+
+        return len(keys)
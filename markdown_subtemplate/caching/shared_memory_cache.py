@@ -0,0 +1,380 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .cache_entry import CacheEntry
+from .cache_version import get_default_version
+from .subtemplate_cache import SubtemplateCache
+from ..exceptions import ArgumentExpectedException, InvalidOperationException
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+class SharedMemoryCache(SubtemplateCache):
+    """
+    Cache stored in a memory-mapped file that every worker process on the host maps.
+    A page rendered by one process is immediately readable by the others, and the
+    content lives once in the OS page cache rather than in every worker's heap.
+
+    The file holds a header, a fixed size open addressing hash index, and an append-only
+    data area. Replaced entries leave their old bytes behind; when the data area or index
+    fills up, the cache starts over empty. A file that already exists keeps its size and
+    slot count, size_bytes and slot_count only apply to new files. Each entry is stamped
+    with its version, so processes running different versions share the file without
+    reading each other's entries.
+    """
+    magic = b'MDSTSHM2'
+    # magic, slot count, entry count, end of data, times the cache filled up and started over
+    header_format = struct.Struct('<8sIIQQ')
+    header_size = 64
+    # key hash, record offset
+    slot_format = struct.Struct('<QQ')
+    # kind, version digest, created, key length, name length, contents length
+    record_format = struct.Struct('<B16sdIII')
+
+    empty_slot = 0
+    deleted_slot = 1
+    kinds = {'html': 1, 'markdown': 2}
+    max_load = 0.75
+    min_data_bytes = 1024
+    # Where msvcrt locks a byte: far past any data, and the same whatever size a process asked for.
+    lock_offset = 1 << 48
+
+    def __init__(self, file_path: str, size_bytes: int = 64 * 1024 * 1024, slot_count: int = 16384,
+                 version: Optional[str] = None):
+        if not file_path or not file_path.strip():
+            raise ArgumentExpectedException('file_path')
+        if slot_count < 1:
+            raise ArgumentExpectedException('slot_count')
+        if not fcntl and not msvcrt:
+            raise InvalidOperationException("SharedMemoryCache needs fcntl or msvcrt to lock the cache file "
+                                            "across processes, neither is available on this platform.")
+
+        self.file_path = file_path
+        self.slot_count = slot_count
+        self.data_start = self.header_size + slot_count * self.slot_format.size
+        self.size_bytes = max(size_bytes, self.data_start + self.min_data_bytes)
+        version = version or get_default_version()
+        self.version_digest = hashlib.md5(version.encode('utf-8')).digest()
+
+        self.lock = threading.RLock()
+        self.__file = None
+        self.__map: Optional[mmap.mmap] = None
+        self.__pid: Optional[int] = None
+
+        self.__get_map()
+
+    def get_html(self, key: str) -> Optional[CacheEntry]:
+        return self.__get('html', key)
+
+    def add_html(self, key: str, name: str, html_contents: str) -> CacheEntry:
+        return self.__add('html', key, name, html_contents)
+
+    def get_markdown(self, key: str) -> Optional[CacheEntry]:
+        return self.__get('markdown', key)
+
+    def add_markdown(self, key: str, name: str, markdown_contents: str) -> CacheEntry:
+        return self.__add('markdown', key, name, markdown_contents)
+
+    def remove_html(self, key: str) -> bool:
+        return self.__remove('html', key)
+
+    def remove_markdown(self, key: str) -> bool:
+        return self.__remove('markdown', key)
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('html', prefix)
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('markdown', prefix)
+
+    def clear(self):
+        with self.lock:
+            mm = self.__get_map()
+            with self.__file_lock(exclusive=True):
+                _, _, _, _, resets = self.__read_header(mm)
+                self.__reset(mm, resets)
+
+    def count(self) -> int:
+        """
+        Entries of every version in the file.
+        """
+        with self.lock:
+            mm = self.__get_map()
+            with self.__file_lock(exclusive=False):
+                return self.__read_header(mm)[2]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            mm = self.__get_map()
+            with self.__file_lock(exclusive=False):
+                _, _, entry_count, data_end, resets = self.__read_header(mm)
+
+        return {
+            'count': entry_count,
+            'bytes': data_end - self.data_start,
+            'capacity_bytes': self.size_bytes - self.data_start,
+            'slots': self.slot_count,
+            'resets': resets,
+        }
+
+    def close(self):
+        with self.lock:
+            if self.__map is not None:
+                self.__map.close()
+                self.__file.close()
+            self.__map = None
+            self.__file = None
+            self.__pid = None
+
+    def __get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            mm = self.__get_map()
+            with self.__file_lock(exclusive=False):
+                slot, offset = self.__find(mm, kind, key)
+                if offset is None:
+                    return None
+
+                _, _, created, key_len, name_len, contents_len = self.record_format.unpack_from(mm, offset)
+                start = offset + self.record_format.size + key_len
+                name = mm[start:start + name_len].decode('utf-8')
+                start += name_len
+                contents = mm[start:start + contents_len].decode('utf-8')
+
+        return CacheEntry(key=key, name=name, created=datetime.fromtimestamp(created), contents=contents)
+
+    def __add(self, kind: str, key: str, name: str, contents: str) -> CacheEntry:
+        created = time.time()
+        key_bytes = key.encode('utf-8')
+        name_bytes = (name or '').encode('utf-8')
+        contents_bytes = (contents or '').encode('utf-8')
+        record_size = self.record_format.size + len(key_bytes) + len(name_bytes) + len(contents_bytes)
+
+        entry = CacheEntry(key=key, name=name, created=datetime.fromtimestamp(created), contents=contents)
+
+        with self.lock:
+            mm = self.__get_map()
+            if self.data_start + record_size > self.size_bytes:
+                # Can never fit, don't wipe everyone else's entries trying.
+                return entry
+
+            with self.__file_lock(exclusive=True):
+                _, _, entry_count, data_end, resets = self.__read_header(mm)
+
+                slot, offset = self.__find(mm, kind, key)
+                is_new = offset is None
+                if data_end + record_size > self.size_bytes or \
+                        (is_new and entry_count + 1 > self.slot_count * self.max_load):
+                    resets += 1
+                    self.__reset(mm, resets)
+                    entry_count, data_end, slot, is_new = 0, self.data_start, None, True
+
+                if slot is None:
+                    slot = self.__free_slot(mm, kind, key)
+
+                position = data_end
+                self.record_format.pack_into(
+                    mm, position, self.kinds[kind], self.version_digest, created,
+                    len(key_bytes), len(name_bytes), len(contents_bytes))
+                position += self.record_format.size
+                for data in (key_bytes, name_bytes, contents_bytes):
+                    mm[position:position + len(data)] = data
+                    position += len(data)
+
+                # Point the index at the record only once the record is complete.
+                self.slot_format.pack_into(mm, self.__slot_offset(slot), self.__hash(kind, key), data_end)
+                self.__write_header(mm, entry_count + (1 if is_new else 0), position, resets)
+
+        return entry
+
+    def __remove(self, kind: str, key: str) -> bool:
+        # Like an invalidated page in SqliteCache, the entries of every version go.
+        with self.lock:
+            mm = self.__get_map()
+            with self.__file_lock(exclusive=True):
+                slots = self.__find_all_versions(mm, kind, key)
+                if not slots:
+                    return False
+
+                _, _, entry_count, data_end, resets = self.__read_header(mm)
+                for slot in slots:
+                    self.slot_format.pack_into(mm, self.__slot_offset(slot), 0, self.deleted_slot)
+                self.__write_header(mm, entry_count - len(slots), data_end, resets)
+
+        return True
+
+    def __remove_prefix(self, kind: str, prefix: str) -> int:
+        prefix_bytes = prefix.encode('utf-8')
+        removed = 0
+
+        with self.lock:
+            mm = self.__get_map()
+            with self.__file_lock(exclusive=True):
+                for slot in range(self.slot_count):
+                    _, offset = self.slot_format.unpack_from(mm, self.__slot_offset(slot))
+                    if offset in (self.empty_slot, self.deleted_slot):
+                        continue
+
+                    record_kind, _, _, key_len, _, _ = self.record_format.unpack_from(mm, offset)
+                    start = offset + self.record_format.size
+                    if record_kind == self.kinds[kind] and mm[start:start + key_len].startswith(prefix_bytes):
+                        self.slot_format.pack_into(mm, self.__slot_offset(slot), 0, self.deleted_slot)
+                        removed += 1
+
+                if removed:
+                    _, _, entry_count, data_end, resets = self.__read_header(mm)
+                    self.__write_header(mm, entry_count - removed, data_end, resets)
+
+        return removed
+
+    def __find(self, mm: mmap.mmap, kind: str, key: str) -> Tuple[Optional[int], Optional[int]]:
+        # Entries of other versions share the key's probe sequence, they are skipped.
+        for slot, offset, version_digest in self.__probe(mm, kind, key):
+            if version_digest == self.version_digest:
+                return slot, offset
+
+        return None, None
+
+    def __find_all_versions(self, mm: mmap.mmap, kind: str, key: str) -> List[int]:
+        return [slot for slot, _, _ in self.__probe(mm, kind, key)]
+
+    def __probe(self, mm: mmap.mmap, kind: str, key: str):
+        # Yields slot, record offset and version digest of each record for kind and key.
+        key_hash = self.__hash(kind, key)
+        key_bytes = key.encode('utf-8')
+
+        slot = key_hash % self.slot_count
+        for _ in range(self.slot_count):
+            slot_hash, offset = self.slot_format.unpack_from(mm, self.__slot_offset(slot))
+            if offset == self.empty_slot:
+                return
+
+            if offset != self.deleted_slot and slot_hash == key_hash:
+                record_kind, version_digest, _, key_len, _, _ = self.record_format.unpack_from(mm, offset)
+                start = offset + self.record_format.size
+                if record_kind == self.kinds[kind] and mm[start:start + key_len] == key_bytes:
+                    yield slot, offset, version_digest
+
+            slot = (slot + 1) % self.slot_count
+
+    def __free_slot(self, mm: mmap.mmap, kind: str, key: str) -> int:
+        slot = self.__hash(kind, key) % self.slot_count
+        for _ in range(self.slot_count):
+            _, offset = self.slot_format.unpack_from(mm, self.__slot_offset(slot))
+            if offset in (self.empty_slot, self.deleted_slot):
+                return slot
+            slot = (slot + 1) % self.slot_count
+
+        raise MemoryError("SharedMemoryCache index is full.")
+
+    def __slot_offset(self, slot: int) -> int:
+        return self.header_size + slot * self.slot_format.size
+
+    @staticmethod
+    def __hash(kind: str, key: str) -> int:
+        # Python's hash() differs per process, this must not.
+        digest = hashlib.blake2b(f'{kind}:{key}'.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def __read_header(self, mm: mmap.mmap) -> tuple:
+        return self.header_format.unpack_from(mm, 0)
+
+    def __write_header(self, mm: mmap.mmap, entry_count: int, data_end: int, resets: int):
+        self.header_format.pack_into(mm, 0, self.magic, self.slot_count, entry_count, data_end, resets)
+
+    def __reset(self, mm: mmap.mmap, resets: int):
+        mm[self.header_size:self.data_start] = bytes(self.data_start - self.header_size)
+        self.__write_header(mm, 0, self.data_start, resets)
+
+    def __file_lock(self, exclusive: bool):
+        return _FileLock(self.__file, exclusive, self.lock_offset)
+
+    def __get_map(self) -> mmap.mmap:
+        # A mapping and its file lock must not be shared across a fork, each process opens its own.
+        pid = os.getpid()
+        if self.__map is not None and self.__pid == pid:
+            return self.__map
+
+        if self.__map is not None:
+            self.__map.close()
+            self.__file.close()
+            self.__map = None
+
+        fd = os.open(self.file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.__file = os.fdopen(fd, 'r+b')
+        self.__pid = pid
+
+        with self.__file_lock(exclusive=True):
+            file_size = os.fstat(fd).st_size
+            if file_size == 0:
+                self.__file.truncate(self.size_bytes)
+            else:
+                # Other processes may have the file mapped, it must never shrink under them.
+                self.size_bytes = file_size
+
+            if self.size_bytes >= self.header_size + self.slot_format.size + self.min_data_bytes:
+                self.__map = self.__open_map(fd)
+
+        if self.__map is None:
+            self.__file.close()
+            self.__file = None
+            raise InvalidOperationException(f"{self.file_path} is not a SharedMemoryCache file.")
+
+        return self.__map
+
+    def __open_map(self, fd: int) -> mmap.mmap:
+        mm = mmap.mmap(fd, self.size_bytes)
+        magic, slot_count, _, _, _ = self.__read_header(mm)
+        if magic == self.magic:
+            self.slot_count = slot_count
+        else:
+            # A new file, or one in an older format: laid out again within its size.
+            self.slot_count = min(self.slot_count,
+                                  (self.size_bytes - self.header_size - self.min_data_bytes) // self.slot_format.size)
+
+        self.data_start = self.header_size + self.slot_count * self.slot_format.size
+        if magic != self.magic:
+            self.__reset(mm, 0)
+
+        return mm
+
+
+class _FileLock:
+    def __init__(self, file, exclusive: bool, lock_offset: int):
+        self.file = file
+        self.exclusive = exclusive
+        # msvcrt locks are mandatory and exclusive, so they are taken on a byte outside the mapped data.
+        self.lock_offset = lock_offset
+
+    def __enter__(self):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+            return
+
+        self.file.seek(self.lock_offset)
+        try:
+            # Retries once a second for about 10 seconds before it gives up.
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        except OSError:
+            raise InvalidOperationException("Timed out waiting for the SharedMemoryCache file lock.")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            return
+
+        self.file.seek(self.lock_offset)
+        msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from .cache_entry import CacheEntry
+from .cache_version import get_default_version
+from .subtemplate_cache import SubtemplateCache
+from ..exceptions import ArgumentExpectedException
+
+
+class SqliteCache(SubtemplateCache):
+    """
+    Persistent cache in a local SQLite file, so rendered pages survive restarts and can be
+    shared by processes on one machine. Entries are stamped with the library and markdown2
+    versions and the renderer, entries written by other versions or renderers are ignored.
+    """
+
+    def __init__(self, db_file: str, version: Optional[str] = None, timeout_seconds: float = 30.0):
+        if not db_file or not db_file.strip():
+            raise ArgumentExpectedException('db_file')
+
+        self.db_file = db_file
+        self.version = version or get_default_version()
+        self.timeout_seconds = timeout_seconds
+
+        self.lock = threading.RLock()
+        self.__connection: Optional[sqlite3.Connection] = None
+        self.__pid: Optional[int] = None
+
+        self.__create_schema()
+
+    def get_html(self, key: str) -> Optional[CacheEntry]:
+        return self.__get('html', key)
+
+    def add_html(self, key: str, name: str, html_contents: str) -> CacheEntry:
+        return self.__add('html', key, name, html_contents)
+
+    def get_markdown(self, key: str) -> Optional[CacheEntry]:
+        return self.__get('markdown', key)
+
+    def add_markdown(self, key: str, name: str, markdown_contents: str) -> CacheEntry:
+        return self.__add('markdown', key, name, markdown_contents)
+
+    def remove_html(self, key: str) -> bool:
+        return self.__remove('html', key)
+
+    def remove_markdown(self, key: str) -> bool:
+        return self.__remove('markdown', key)
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('html', prefix)
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        return self.__remove_prefix('markdown', prefix)
+
+    def clear(self):
+        with self.lock:
+            self.__get_connection().execute("DELETE FROM cache_entries")
+
+    def count(self) -> int:
+        with self.lock:
+            row = self.__get_connection().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE version = ?", (self.version,)).fetchone()
+
+        return row[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.__get_connection().execute(
+                "SELECT version = ?, COUNT(*) FROM cache_entries GROUP BY version = ?",
+                (self.version, self.version)).fetchall()
+
+        counts = {bool(current): count for current, count in rows}
+        return {'count': counts.get(True, 0), 'other_versions': counts.get(False, 0)}
+
+    def remove_other_versions(self) -> int:
+        """
+        Deletes entries written by other library or markdown2 versions, returns how many.
+        """
+        with self.lock:
+            cursor = self.__get_connection().execute(
+                "DELETE FROM cache_entries WHERE version != ?", (self.version,))
+
+        return cursor.rowcount
+
+    def __get(self, kind: str, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            row = self.__get_connection().execute(
+                "SELECT name, created, contents FROM cache_entries WHERE kind = ? AND key = ? AND version = ?",
+                (kind, key, self.version)).fetchone()
+
+        if not row:
+            return None
+
+        name, created, contents = row
+        return CacheEntry(key=key, name=name, created=datetime.fromtimestamp(created), contents=contents)
+
+    def __add(self, kind: str, key: str, name: str, contents: str) -> CacheEntry:
+        created = time.time()
+
+        # A single statement in autocommit mode, readers see the old or the new row, never part of one.
+        with self.lock:
+            self.__get_connection().execute(
+                "INSERT OR REPLACE INTO cache_entries (kind, key, name, created, contents, version) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, name, created, contents, self.version))
+
+        return CacheEntry(key=key, name=name, created=datetime.fromtimestamp(created), contents=contents)
+
+    def __remove(self, kind: str, key: str) -> bool:
+        with self.lock:
+            cursor = self.__get_connection().execute(
+                "DELETE FROM cache_entries WHERE kind = ? AND key = ?", (kind, key))
+
+        return cursor.rowcount > 0
+
+    def __remove_prefix(self, kind: str, prefix: str) -> int:
+        # substr rather than LIKE, keys may contain % and _.
+        with self.lock:
+            cursor = self.__get_connection().execute(
+                "DELETE FROM cache_entries WHERE kind = ? AND substr(key, 1, ?) = ?", (kind, len(prefix), prefix))
+
+        return cursor.rowcount
+
+    def __get_connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, each process opens its own.
+        pid = os.getpid()
+        if self.__connection is None or self.__pid != pid:
+            self.__connection = sqlite3.connect(
+                self.db_file, timeout=self.timeout_seconds, isolation_level=None, check_same_thread=False)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            self.__pid = pid
+
+        return self.__connection
+
+    def __create_schema(self):
+        with self.lock:
+            self.__get_connection().execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "kind TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "name TEXT, "
+                "created REAL NOT NULL, "
+                "contents TEXT, "
+                "version TEXT NOT NULL, "
+                "PRIMARY KEY (kind, key))")
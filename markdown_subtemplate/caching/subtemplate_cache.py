@@ -1,10 +1,17 @@
 import abc
-from typing import Optional
+from typing import Optional, Dict, Callable, List
 
 from .cache_entry import CacheEntry
+from .single_flight import SingleFlight
 
 
 class SubtemplateCache(abc.ABC):
+    # Shared by all cache instances, calls are keyed by instance and cache key.
+    single_flight = SingleFlight()
+    # Called with (kind, key) when any cache drops an entry on its own, by eviction or expiration,
+    # so what is kept alongside the cache (e.g. compiled pages) can go with it.
+    eviction_listeners: List[Callable[[str, str], None]] = []
+
     @abc.abstractmethod
     def get_html(self, key: str) -> CacheEntry:
         pass
@@ -29,4 +36,61 @@ class SubtemplateCache(abc.ABC):
     def count(self) -> int:
         pass
 
+    def remove_html(self, key: str) -> bool:
+        """
+        Optional: drop a single HTML entry, returns True if it was present.
+        Caches that do not support this are cleared entirely when entries need invalidating.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support removing entries.")
+
+    def remove_markdown(self, key: str) -> bool:
+        """
+        Optional: drop a single markdown entry, returns True if it was present.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support removing entries.")
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        """
+        Optional: drop the HTML entries whose key starts with prefix, returns how many.
+        Without it, pages are invalidated one at a time (or the cache is cleared).
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support removing entries by prefix.")
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        """
+        Optional: drop the markdown entries whose key starts with prefix, returns how many.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support removing entries by prefix.")
+
+    def notify_evicted(self, kind: str, key: str):
+        for listener in self.eviction_listeners:
+            listener(kind, key)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters describing the cache. Implementations can report more than the count,
+        e.g. hits, misses, and evictions.
+        """
+        return {'count': self.count()}
+
+    def get_or_add_html(self, key: str, name: str, create_html: Callable[[], str],
+                        missed: bool = False) -> CacheEntry:
+        """
+        Returns the cached HTML for key, calling create_html() to build it on a miss.
+        Concurrent misses for the same key wait on a single call to create_html().
+        Pass missed=True when get_html(key) just returned nothing, to skip looking it up again.
+        """
+        if not missed:
+            entry = self.get_html(key)
+            if entry:
+                return entry
+
+        def create_entry() -> CacheEntry:
+            # Another thread may have finished this key between our miss and taking the lead.
+            existing = self.get_html(key)
+            if existing:
+                return existing
+
+            return self.add_html(key, name, create_html())
 
+        return self.single_flight.run((id(self), key), create_entry)
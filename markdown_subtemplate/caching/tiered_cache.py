@@ -0,0 +1,97 @@
+import threading
+from typing import Dict, Optional
+
+from .bounded_memory_cache import BoundedMemoryCache
+from .cache_entry import CacheEntry
+from .subtemplate_cache import SubtemplateCache
+from ..exceptions import ArgumentExpectedException
+
+
+class TieredCache(SubtemplateCache):
+    """
+    A small in-process L1 cache in front of a slower, shared L2 cache (e.g. SqliteCache or
+    your own database cache). Reads are answered from L1 when possible and fill it from L2,
+    writes and removals go to both. Entries other processes remove from L2 stay in this
+    process' L1 until they are evicted, give L1 a ttl_seconds to bound that.
+    """
+
+    def __init__(self, l2: SubtemplateCache, l1: Optional[SubtemplateCache] = None):
+        if not l2 or not isinstance(l2, SubtemplateCache):
+            raise ArgumentExpectedException('l2')
+        if l1 is not None and not isinstance(l1, SubtemplateCache):
+            raise ArgumentExpectedException('l1')
+
+        self.l1 = l1 if l1 is not None else BoundedMemoryCache(max_entries=1000)
+        self.l2 = l2
+
+        self.lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def get_html(self, key: str) -> Optional[CacheEntry]:
+        return self.__get(key, self.l1.get_html, self.l2.get_html, self.l1.add_html)
+
+    def add_html(self, key: str, name: str, html_contents: str) -> CacheEntry:
+        entry = self.l2.add_html(key, name, html_contents)
+        self.l1.add_html(key, name, html_contents)
+
+        return entry
+
+    def get_markdown(self, key: str) -> Optional[CacheEntry]:
+        return self.__get(key, self.l1.get_markdown, self.l2.get_markdown, self.l1.add_markdown)
+
+    def add_markdown(self, key: str, name: str, markdown_contents: str) -> CacheEntry:
+        entry = self.l2.add_markdown(key, name, markdown_contents)
+        self.l1.add_markdown(key, name, markdown_contents)
+
+        return entry
+
+    def remove_html(self, key: str) -> bool:
+        removed = self.l1.remove_html(key)
+        return self.l2.remove_html(key) or removed
+
+    def remove_markdown(self, key: str) -> bool:
+        removed = self.l1.remove_markdown(key)
+        return self.l2.remove_markdown(key) or removed
+
+    def remove_html_prefix(self, prefix: str) -> int:
+        removed = self.l1.remove_html_prefix(prefix)
+        return max(self.l2.remove_html_prefix(prefix), removed)
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        removed = self.l1.remove_markdown_prefix(prefix)
+        return max(self.l2.remove_markdown_prefix(prefix), removed)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def count(self) -> int:
+        # Everything in L1 was written to or read from L2.
+        return self.l2.count()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            counters = {'l1_hits': self.l1_hits, 'l2_hits': self.l2_hits, 'misses': self.misses}
+
+        return {'count': self.count(), **counters, 'l1': self.l1.stats(), 'l2': self.l2.stats()}
+
+    def __get(self, key: str, get_l1, get_l2, add_l1) -> Optional[CacheEntry]:
+        entry = get_l1(key)
+        if entry:
+            with self.lock:
+                self.l1_hits += 1
+            return entry
+
+        entry = get_l2(key)
+        with self.lock:
+            if entry:
+                self.l2_hits += 1
+            else:
+                self.misses += 1
+
+        if entry:
+            add_l1(key, entry.name, entry.contents)
+
+        return entry
@@ -1,29 +1,309 @@
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 from . import caching as __caching, storage
 from . import logging as __logging
-from .infrastructure import page as __page
+from . import metrics as __metrics
+from .infrastructure import page as __page, compiled_template as __compiled_template
+from .infrastructure import change_tracking as __change_tracking
+from .infrastructure import dependency_graph as __dependency_graph
+from .infrastructure import page_async as __page_async
+from .infrastructure import warm_up as __warm_up
+from .infrastructure import markdown_transformer as __markdown_transformer
+from .infrastructure import output_cache as __output_cache
 
 
-def get_page(template_path: str, data: Dict[str, Any] = {}) -> str:
-    from markdown_subtemplate.exceptions import InvalidOperationException
-    log = __logging.get_log()
+def get_page(template_path: str, data: Dict[str, Any] = {}, encoding: Optional[str] = None) -> Union[str, bytes]:
+    """
+    Returns the page HTML. With encoding='gzip' or 'deflate' it returns the compressed UTF-8 bytes
+    instead. Pages whose variables are not filled by data are compressed once and then reused.
+    """
+    log = __check_storage('get_page')
 
-    if not storage.is_initialized():
-        msg = "Storage engine is not initialized."
-        log.error("engine.get_page: " + msg)
-        raise InvalidOperationException(msg)
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page: Getting page content for {template_path}")
+    if encoding:
+        return __page.get_page_compressed(template_path, data, encoding)
 
-    log.verbose(f"engine.get_page: Getting page content for {template_path}")
     return __page.get_page(template_path, data)
 
 
-def clear_cache():
+async def get_page_async(template_path: str, data: Dict[str, Any] = {}) -> str:
+    """
+    Like get_page(), but reads templates through the async storage engine (see storage.set_async_storage)
+    and converts markdown to HTML in an executor so cold renders do not block the event loop.
+    """
+    log = __check_storage('get_page_async', storage.is_async_initialized())
+
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page_async: Getting page content for {template_path}")
+    return await __page_async.get_page_async(template_path, data)
+
+
+def get_page_bytes(template_path: str, data: Dict[str, Any] = {}, buffers: bool = False) \
+        -> Union[bytes, List[bytes]]:
+    """
+    Returns the page as UTF-8 bytes, or with buffers=True as a list of bytes for writelines()
+    or socket.sendmsg(). The cached HTML is encoded once, only values from data are encoded per call.
+    """
+    log = __check_storage('get_page_bytes')
+
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page_bytes: Getting page bytes for {template_path}")
+    return __page.get_page_bytes(template_path, data, buffers)
+
+
+def get_page_with_meta(template_path: str, data: Dict[str, Any] = {}) -> '__page.PageMeta':
+    """
+    Returns PageMeta(html, etag, last_modified). The ETag is a hash of the cached page combined with
+    the values substituted from data, last_modified is the newest time of the template and its imports.
+    """
+    log = __check_storage('get_page_with_meta')
+
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page_with_meta: Getting page content for {template_path}")
+    return __page.get_page_with_meta(template_path, data)
+
+
+def get_page_meta(template_path: str, data: Dict[str, Any] = {}) -> '__page.PageMeta':
+    """
+    Like get_page_with_meta() but html is None, so answering a conditional GET with a 304
+    neither renders the page nor hashes its HTML.
+    """
+    log = __check_storage('get_page_meta')
+
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page_meta: Getting page metadata for {template_path}")
+    return __page.get_page_meta(template_path, data)
+
+
+def get_page_stream(template_path: str, data: Dict[str, Any] = {}) -> Iterator[str]:
+    log = __check_storage('get_page_stream')
+
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page_stream: Streaming page content for {template_path}")
+    return __page.get_page_stream(template_path, data)
+
+
+def get_page_stream_bytes(template_path: str, data: Dict[str, Any] = {}) -> Iterator[bytes]:
+    log = __check_storage('get_page_stream_bytes')
+
+    if log.is_enabled(__logging.LogLevel.verbose):
+        log.verbose(f"engine.get_page_stream_bytes: Streaming page bytes for {template_path}")
+    return __page.get_page_stream_bytes(template_path, data)
+
+
+def clear_cache(namespace: Optional[str] = None):
+    """
+    Clears every cache, or with namespace only that namespace's cache (see caching.use_namespace)
+    leaving other namespaces untouched.
+    """
     log = __logging.get_log()
-    cache = __caching.get_cache()
 
-    item_count = cache.count()
-    cache.clear()
+    if namespace is not None:
+        cache = __caching.get_cache(namespace)
+        item_count = cache.count()
+        cache.clear()
+        __compiled_template.clear(namespace)
+        __output_cache.clear(namespace)
+
+        log.info(f"engine.clear_cache: Cache for {namespace} cleared, reclaimed {item_count:,} items.")
+        return
+
+    item_count = 0
+    for cache in __caching.get_caches():
+        item_count += cache.count()
+        cache.clear()
+
+    __compiled_template.clear()
+    __output_cache.clear()
+    __change_tracking.clear()
+    __dependency_graph.clear()
 
     log.info(f"engine.clear_cache: Cache cleared, reclaimed {item_count:,} items.")
 
+
+def set_auto_reload(enabled: bool, check_interval_seconds: float = 2.0):
+    """
+    When enabled, cached pages remember the modification stamps of their template and
+    every shared import. Pages are checked at most once per interval and only the stale
+    ones are regenerated. Pages cached before enabling are not tracked until regenerated.
+    """
+    log = __logging.get_log()
+
+    if enabled:
+        __change_tracking.enable(check_interval_seconds)
+        log.info(f"engine.set_auto_reload: Checking templates for changes every {check_interval_seconds} sec.")
+    else:
+        __change_tracking.disable()
+        log.info("engine.set_auto_reload: Template change checks disabled.")
+
+
+def set_max_import_depth(max_depth: int):
+    """
+    Limits how deeply [IMPORT ...] statements can be nested, the default is 25.
+    Deeper nesting raises ImportDepthException, import cycles raise ImportCycleException.
+    """
+    __page.set_max_import_depth(max_depth)
+
+
+def set_fragment_cache(enabled: bool):
+    """
+    When enabled, markdown is rendered a top-level block at a time and each block's HTML is
+    cached by its content. Re-rendering a page after one import or block changes only converts
+    the blocks that changed, and blocks shared by many pages are converted once.
+    """
+    __markdown_transformer.set_fragments_enabled(enabled)
+
+
+def set_compiled_cache(max_entries: int = 1000):
+    """
+    Sets how many compiled pages (HTML split into literal text and $VARIABLE$ slots) are kept
+    in memory next to the cache, the least recently used are dropped first. Pages a
+    BoundedMemoryCache evicts or expires are dropped with it regardless.
+    """
+    log = __logging.get_log()
+
+    __compiled_template.set_max_entries(max_entries)
+    log.info(f"engine.set_compiled_cache: Keeping up to {max_entries:,} compiled pages.")
+
+
+def set_output_cache(enabled: bool, max_entries: Optional[int] = 1000, max_bytes: Optional[int] = None):
+    """
+    When enabled, get_page() remembers its final output for each page and set of substituted
+    values, so repeat combinations return without any string work. The least recently used
+    outputs are dropped beyond max_entries or max_bytes (characters). Opt pages out with
+    exclude_from_output_cache().
+    """
+    log = __logging.get_log()
+
+    if enabled:
+        __output_cache.enable(max_entries, max_bytes)
+        log.info(f"engine.set_output_cache: Keeping up to {max_entries or 'unlimited'} rendered outputs.")
+    else:
+        __output_cache.disable()
+        log.info("engine.set_output_cache: Output cache disabled.")
+
+
+def exclude_from_output_cache(template_path: str, excluded: bool = True):
+    """
+    Stops (or with excluded=False resumes) memoizing output for this page, e.g. when its
+    data rarely repeats and would only push useful entries out.
+    """
+    if not template_path or not template_path.strip():
+        from markdown_subtemplate.exceptions import ArgumentExpectedException
+        raise ArgumentExpectedException('template_path')
+
+    __output_cache.set_excluded(template_path, excluded)
+
+
+def invalidate(template_path: str):
+    """
+    Evicts the cached markdown and HTML of one page, e.g. after publishing an edit.
+    The page is regenerated the next time it is requested.
+    """
+    from markdown_subtemplate.exceptions import ArgumentExpectedException
+    log = __logging.get_log()
+
+    if not template_path or not template_path.strip():
+        raise ArgumentExpectedException('template_path')
+
+    __page.invalidate_page(template_path.strip().lower())
+    log.info(f"engine.invalidate: Invalidated {template_path}.")
+
+
+def invalidate_prefix(prefix: str) -> int:
+    """
+    Evicts every page whose template path starts with prefix, e.g. 'docs/', in all cache namespaces.
+    Returns the number of cached pages removed.
+    """
+    from markdown_subtemplate.exceptions import ArgumentExpectedException
+    log = __logging.get_log()
+
+    if not prefix or not prefix.strip():
+        raise ArgumentExpectedException('prefix')
+
+    count = __page.invalidate_prefix(prefix.strip().lower())
+    log.info(f"engine.invalidate_prefix: Invalidated {count:,} pages starting with {prefix}.")
+    return count
+
+
+def invalidate_import(import_name: str) -> int:
+    """
+    Evicts the cached markdown and HTML of every page that uses the shared import,
+    directly or through nested imports. Returns the number of pages invalidated.
+    """
+    from markdown_subtemplate.exceptions import ArgumentExpectedException
+    log = __logging.get_log()
+
+    if not import_name or not import_name.strip():
+        raise ArgumentExpectedException('import_name')
+
+    pages = __dependency_graph.get_pages_using(import_name)
+    for template_path in pages:
+        __page.invalidate_page(template_path)
+
+    log.info(f"engine.invalidate_import: Invalidated {len(pages):,} pages using {import_name}.")
+    return len(pages)
+
+
+def get_import_graph() -> Dict[str, List[str]]:
+    """
+    The shared imports seen so far, each mapped to the pages that use it.
+    """
+    return __dependency_graph.get_graph()
+
+
+def get_pages_using_import(import_name: str) -> List[str]:
+    return __dependency_graph.get_pages_using(import_name)
+
+
+def warm_up(workers: Optional[int] = None) -> '__warm_up.WarmUpResult':
+    """
+    Renders every page in the FileStore template folder into the cache using a process pool.
+    Shared imports are not pages, they are rendered as part of the pages that import them.
+    Call it before forking (e.g. gunicorn --preload) so workers share the warmed in-memory
+    cache copy-on-write. Returns the number of pages rendered, any errors, and the time taken.
+    """
+    from markdown_subtemplate.exceptions import InvalidOperationException
+    from markdown_subtemplate.storage.file_storage import FileStore
+    log = __logging.get_log()
+
+    store = storage.get_storage()
+    if not isinstance(store, FileStore) or not store.is_initialized():
+        msg = "Warm up requires an initialized FileStore storage engine."
+        log.error("engine.warm_up: " + msg)
+        raise InvalidOperationException(msg)
+
+    template_paths = store.get_template_paths(include_shared=False)
+    return __warm_up.warm_up(template_paths, workers)
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Cache hit and miss counters, hit ratios, storage reads, import expansions, and render latency
+    histograms (in ms) since the process started or reset_stats() was called, plus the cache's own stats
+    and the size of the output cache.
+    """
+    stats = __metrics.get_stats()
+    stats['cache'] = __caching.get_cache().stats()
+    stats['output_cache'] = __output_cache.stats()
+
+    return stats
+
+
+def reset_stats():
+    __metrics.reset()
+
+
+def __check_storage(caller: str, initialized: Optional[bool] = None) -> '__logging.SubtemplateLogger':
+    log = __logging.get_log()
+    if initialized is None:
+        initialized = storage.is_initialized()
+
+    if not initialized:
+        from markdown_subtemplate.exceptions import InvalidOperationException
+        msg = "Storage engine is not initialized."
+        log.error(f"engine.{caller}: " + msg)
+        raise InvalidOperationException(msg)
+
+    return log
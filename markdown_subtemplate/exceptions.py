@@ -19,3 +19,13 @@ class TemplateNotFoundException(PathException):
         super().__init__(f'Template not found: {template_path}.')
 
 
+class ImportCycleException(MarkdownTemplateException):
+    def __init__(self, import_chain):
+        super().__init__(f'Import cycle detected: {" -> ".join(import_chain)}.')
+        self.import_chain = list(import_chain)
+
+
+class ImportDepthException(MarkdownTemplateException):
+    def __init__(self, import_name, max_depth):
+        super().__init__(f'Import {import_name} is nested more than {max_depth} levels deep.')
+        self.max_depth = max_depth
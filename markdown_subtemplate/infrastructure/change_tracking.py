@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Any
+
+import markdown_subtemplate.storage as __storage
+from markdown_subtemplate.storage import SubtemplateStorage
+
+# Opt-in: when enabled, pages remember the stamps (e.g. mtime and size) of their template
+# and every import they pulled in. A page is checked against storage at most once per interval.
+__enabled = False
+__check_interval_seconds = 2.0
+
+__lock = threading.Lock()
+# template_path -> (stamps, time of the last check)
+__pages: Dict[str, Tuple[Dict[Tuple[str, str], Any], float]] = {}
+
+
+def enable(check_interval_seconds: float = 2.0):
+    global __enabled, __check_interval_seconds
+
+    __check_interval_seconds = max(0.0, check_interval_seconds)
+    __enabled = True
+
+
+def disable():
+    global __enabled
+
+    __enabled = False
+    clear()
+
+
+def is_enabled() -> bool:
+    return __enabled
+
+
+def track(template_path: str, imports: List[str]):
+    if not __enabled:
+        return
+
+    stamps = __get_stamps(template_path, imports)
+    with __lock:
+        __pages[template_path] = (stamps, time.monotonic())
+
+
+def is_stale(template_path: str) -> bool:
+    if not __enabled:
+        return False
+
+    now = time.monotonic()
+    with __lock:
+        tracked = __pages.get(template_path)
+        if not tracked:
+            return False
+
+        stamps, checked = tracked
+        if now - checked < __check_interval_seconds:
+            return False
+
+        __pages[template_path] = (stamps, now)
+
+    imports = [name for kind, name in stamps if kind == 'import']
+    return __get_stamps(template_path, imports) != stamps
+
+
+def forget(template_path: str):
+    with __lock:
+        __pages.pop(template_path, None)
+
+
+def clear():
+    with __lock:
+        __pages.clear()
+
+
+def __get_stamps(template_path: str, imports: List[str]) -> Dict[Tuple[str, str], Optional[Any]]:
+    store: SubtemplateStorage = __storage.get_storage()
+
+    stamps = {('page', template_path): store.get_markdown_stamp(template_path)}
+    for import_name in imports:
+        stamps[('import', import_name)] = store.get_shared_stamp(import_name)
+
+    return stamps
@@ -0,0 +1,300 @@
+import gzip
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Iterator
+
+from markdown_subtemplate import caching as __caching
+from markdown_subtemplate.exceptions import ArgumentExpectedException
+
+# Compiled pages are kept apart from the cache, whose entries may be rebuilt on every read.
+# A page is dropped when a cache evicts or expires its HTML, and beyond max_entries the
+# least recently used pages go first.
+__max_entries = 1000
+__lock = threading.Lock()
+# (cache namespace, key) -> compiled page, oldest first.
+__compiled: 'OrderedDict[Tuple[Optional[str], str], CompiledTemplate]' = OrderedDict()
+
+# Content-Encoding values render_compressed() can produce.
+encodings = ('gzip', 'deflate')
+
+
+class CompiledTemplate:
+    """
+    HTML scanned once for $VARIABLE$ slots. Rendering fills the slots and joins the
+    literal segments in a single pass.
+    """
+    # A slot can start at any $ followed by a name and another $ on the same line. Keys are
+    # upper-cased before they are matched, so names with lower-case letters are never slots.
+    # The lookahead finds overlapping candidates: in 'Only $100 $NAME$' both '$100 $' and
+    # '$NAME$' are candidates, which of them are slots depends on the keys in data.
+    placeholder_pattern = re.compile(r'\$(?=([^$\na-z]+)\$)')
+    # Distinct sets of keys seen per page before the split layouts are dropped and rebuilt.
+    max_layouts = 32
+
+    def __init__(self, source: str):
+        self.source = source
+        # Possible slots in order: start, end, name. They may overlap.
+        self.slots: List[Tuple[int, int, str]] = [
+            (match.start(), match.start() + len(match.group(1)) + 2, match.group(1))
+            for match in self.placeholder_pattern.finditer(source or '')
+        ]
+        self.names = frozenset(name for _, _, name in self.slots)
+        # Newest modification time of the page's sources, filled in by the page module.
+        self.last_modified: Optional[datetime] = None
+        self.__content_hash: Optional[str] = None
+        self.__compressed: Dict[str, bytes] = {}
+        # UTF-8 copy of source, made the first time bytes are asked for.
+        self.__source_bytes: Optional[bytes] = None
+        # Names that data fills -> the source split at the slots those names fill.
+        self.__layouts: Dict[FrozenSet[str], _Layout] = {}
+
+    def render(self, data: Dict[str, Any]) -> str:
+        if not self.slots or not data:
+            return self.source
+
+        values = get_values(data)
+        layout = self.__get_layout(values)
+        if not layout.slots:
+            return self.source
+
+        parts = list(layout.parts)
+        for idx, name in layout.slots:
+            parts[idx] = values[name]
+
+        return ''.join(parts)
+
+    @property
+    def content_hash(self) -> str:
+        if self.__content_hash is None:
+            self.__content_hash = hashlib.md5((self.source or '').encode('utf-8')).hexdigest()
+
+        return self.__content_hash
+
+    def get_etag(self, data: Dict[str, Any]) -> str:
+        """
+        A strong ETag for render(data): the content hash combined with the values that fill
+        the slots. Only the slots are hashed per request, never the full HTML.
+        """
+        filled = self.get_slot_values(data)
+        if all(value is None for value in filled):
+            return f'"{self.content_hash}"'
+
+        md5 = hashlib.md5(self.content_hash.encode('utf-8'))
+        for value in filled:
+            md5.update(b'\x00' if value is None else b'\x01' + value.encode('utf-8') + b'\x00')
+
+        return f'"{md5.hexdigest()}"'
+
+    def render_compressed(self, data: Dict[str, Any], encoding: str) -> bytes:
+        """
+        render(data) as UTF-8, compressed with gzip or deflate. When data fills no slots the
+        output never changes, so it is compressed once (at the highest level) and reused.
+        """
+        if any(value is not None for value in self.get_slot_values(data)):
+            return compress(self.render_bytes(data), encoding)
+
+        compressed = self.__compressed.get(encoding)
+        if compressed is None:
+            compressed = compress(self.render_bytes({}), encoding, level=9)
+            self.__compressed[encoding] = compressed
+
+        return compressed
+
+    def render_buffers(self, data: Dict[str, Any]) -> List[bytes]:
+        """
+        render(data) as UTF-8 buffers for writelines() or sendmsg(). The literal segments are
+        encoded once and reused, only the values from data are encoded per call.
+        """
+        values = get_values(data) if data and self.slots else {}
+        layout = self.__get_layout(values) if values else None
+        if layout is None or not layout.slots:
+            if self.__source_bytes is None:
+                self.__source_bytes = (self.source or '').encode('utf-8')
+            return [self.__source_bytes]
+
+        if layout.parts_bytes is None:
+            layout.parts_bytes = [part.encode('utf-8') for part in layout.parts]
+
+        buffers = list(layout.parts_bytes)
+        for idx, name in layout.slots:
+            buffers[idx] = values[name].encode('utf-8')
+
+        return buffers
+
+    def render_bytes(self, data: Dict[str, Any]) -> bytes:
+        buffers = self.render_buffers(data)
+        return buffers[0] if len(buffers) == 1 else b''.join(buffers)
+
+    def iter_render(self, data: Dict[str, Any]) -> Iterator[str]:
+        values = get_values(data) if data and self.slots else {}
+        if not values:
+            if self.source:
+                yield self.source
+            return
+
+        layout = self.__get_layout(values)
+        slots = iter(layout.slots)
+        slot_idx, name = next(slots, (-1, None))
+        for idx, part in enumerate(layout.parts):
+            if idx == slot_idx:
+                part = values[name]
+                slot_idx, name = next(slots, (-1, None))
+
+            if part:
+                yield part
+
+    def iter_render_bytes(self, data: Dict[str, Any], encoding: str = 'utf-8') -> Iterator[bytes]:
+        if encoding.lower().replace('-', '') == 'utf8':
+            yield from (buffer for buffer in self.render_buffers(data) if buffer)
+            return
+
+        for part in self.iter_render(data):
+            yield part.encode(encoding)
+
+    def get_slot_values(self, data: Dict[str, Any]) -> List[Optional[str]]:
+        """
+        The value data has for each possible slot, in order, None for names it doesn't have.
+        Together they decide the output of render(data).
+        """
+        values = get_values(data) if data and self.slots else {}
+        return [values.get(name) for _, _, name in self.slots]
+
+    def __get_layout(self, values: Dict[str, str]) -> '_Layout':
+        names = frozenset(name for name in self.names if name in values)
+        layout = self.__layouts.get(names)
+        if layout is not None:
+            return layout
+
+        # Left to right, a slot whose name data has wins over the candidates overlapping it,
+        # the same as str.replace() in page.process_variables.
+        source = self.source
+        parts: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        position = 0
+        for start, end, name in self.slots:
+            if start < position or name not in names:
+                continue
+
+            if start > position:
+                parts.append(source[position:start])
+            slots.append((len(parts), name))
+            parts.append(source[start:end])
+            position = end
+
+        if source and position < len(source):
+            parts.append(source[position:])
+
+        if len(self.__layouts) >= self.max_layouts:
+            self.__layouts.clear()
+
+        layout = _Layout(parts, slots)
+        self.__layouts[names] = layout
+        return layout
+
+
+class _Layout:
+    """
+    The source split into literal segments at the slots one set of names fills.
+    """
+    def __init__(self, parts: List[str], slots: List[Tuple[int, str]]):
+        self.parts = parts
+        self.slots = slots
+        # UTF-8 copies of parts, made the first time bytes are asked for.
+        self.parts_bytes: Optional[List[bytes]] = None
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    from markdown_subtemplate.exceptions import InvalidOperationException
+
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level)
+    if encoding == 'deflate':
+        # HTTP's deflate is the zlib format.
+        return zlib.compress(data, level)
+
+    raise InvalidOperationException(f"Unsupported encoding: {encoding}. Use one of: {', '.join(encodings)}.")
+
+
+def get_values(data: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        key.strip().upper(): str(value)
+        for key, value in data.items()
+        if key and isinstance(key, str)
+    }
+
+
+def set_max_entries(max_entries: int):
+    global __max_entries
+
+    if not max_entries or max_entries < 1:
+        raise ArgumentExpectedException('max_entries')
+
+    __max_entries = max_entries
+    with __lock:
+        while len(__compiled) > __max_entries:
+            __compiled.popitem(last=False)
+
+
+def get_max_entries() -> int:
+    return __max_entries
+
+
+def count() -> int:
+    return len(__compiled)
+
+
+def get_compiled(key: str, html: str) -> CompiledTemplate:
+    memo_key = (__caching.get_namespace(), key)
+    with __lock:
+        compiled = __compiled.get(memo_key)
+        if compiled is not None and (compiled.source is html or compiled.source == html):
+            __compiled.move_to_end(memo_key)
+            return compiled
+
+    compiled = CompiledTemplate(html)
+    with __lock:
+        __compiled[memo_key] = compiled
+        __compiled.move_to_end(memo_key)
+        while len(__compiled) > __max_entries:
+            __compiled.popitem(last=False)
+
+    return compiled
+
+
+def remove(key: str):
+    # In every namespace, they all read the same templates.
+    namespaces = [None, *__caching.get_namespaces()]
+    with __lock:
+        for namespace in namespaces:
+            __compiled.pop((namespace, key), None)
+
+
+def remove_prefix(key_prefix: str):
+    with __lock:
+        for memo_key in [k for k in __compiled if k[1].startswith(key_prefix)]:
+            del __compiled[memo_key]
+
+
+def clear(namespace: Optional[str] = None):
+    """
+    Drops the compiled pages of one namespace, or of all of them when namespace is None.
+    """
+    with __lock:
+        if namespace is None:
+            __compiled.clear()
+            return
+
+        for memo_key in [k for k in __compiled if k[0] == namespace]:
+            del __compiled[memo_key]
+
+
+def __on_evicted(kind: str, key: str):
+    if kind == 'html':
+        remove(key)
+
+
+__caching.SubtemplateCache.eviction_listeners.append(__on_evicted)
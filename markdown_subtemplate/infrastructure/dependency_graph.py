@@ -0,0 +1,64 @@
+import threading
+from typing import Dict, List, Set
+
+# Built up as pages are loaded: which shared imports each page uses (directly or nested)
+# and, in reverse, which pages use each shared import. Import names are lower case.
+__lock = threading.Lock()
+__page_imports: Dict[str, Set[str]] = {}
+__import_pages: Dict[str, Set[str]] = {}
+
+
+def record(template_path: str, imports: List[str]):
+    import_names = {name.strip().lower() for name in imports if name and name.strip()}
+
+    with __lock:
+        __remove_page(template_path)
+
+        __page_imports[template_path] = import_names
+        for name in import_names:
+            __import_pages.setdefault(name, set()).add(template_path)
+
+
+def forget(template_path: str):
+    with __lock:
+        __remove_page(template_path)
+
+
+def get_pages_using(import_name: str) -> List[str]:
+    with __lock:
+        return sorted(__import_pages.get(import_name.strip().lower(), ()))
+
+
+def get_imports_of(template_path: str) -> List[str]:
+    with __lock:
+        return sorted(__page_imports.get(template_path, ()))
+
+
+def get_pages() -> List[str]:
+    with __lock:
+        return sorted(__page_imports)
+
+
+def get_graph() -> Dict[str, List[str]]:
+    with __lock:
+        return {
+            name: sorted(pages)
+            for name, pages in sorted(__import_pages.items())
+        }
+
+
+def clear():
+    with __lock:
+        __page_imports.clear()
+        __import_pages.clear()
+
+
+def __remove_page(template_path: str):
+    for name in __page_imports.pop(template_path, ()):
+        pages = __import_pages.get(name)
+        if pages is None:
+            continue
+
+        pages.discard(template_path)
+        if not pages:
+            del __import_pages[name]
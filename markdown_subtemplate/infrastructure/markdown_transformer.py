@@ -1,37 +1,145 @@
 import hashlib
+import re
+import time
+from typing import List, Optional, Tuple
 
-import markdown2
 from .. import caching as __caching
+from .. import metrics as __metrics
+from .. import rendering as __rendering
 
-# Note: Do NOT enable link-patterns, it causes a crash.
-__enabled_markdown_extras = [
-    "cuddled-lists",
-    "code-friendly",
-    "fenced-code-blocks",
-    "tables"
-]
+__fragments_enabled = False
+
+# Constructs whose meaning crosses blank lines anywhere in the document:
+# reference link definitions and raw HTML blocks.
+__whole_document_pattern = re.compile(r'^ {0,3}(\[[^\]\n]+\]:|<)', re.MULTILINE)
+__fence_pattern = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+__list_pattern = re.compile(r'^ {0,3}([*+-]|\d+[.)])[ \t]')
 
 
 def transform(text, safe_mode=True):
     if not text:
         return text
 
+    renderer = __rendering.get_renderer()
     hash_val = get_hash(text)
+    if renderer.name != __rendering.Markdown2Renderer.name:
+        # Keep other renderers' HTML apart, markdown2 keeps the plain hash used all along.
+        hash_val = f'{renderer.name}:{hash_val}'
 
     cache = __caching.get_cache()
     entry = cache.get_html(hash_val)
     if entry:
+        __metrics.increment(__metrics.transform_cache_hits)
         return entry.contents
 
-    html = markdown2.markdown(text, extras=__enabled_markdown_extras, safe_mode=safe_mode)
+    __metrics.increment(__metrics.transform_cache_misses)
+    t0 = time.perf_counter()
+
+    blocks = split_blocks(text) if __fragments_enabled else None
+    if blocks and len(blocks) > 1:
+        html = '\n'.join(__transform_block(block, safe_mode, renderer, cache) for block in blocks)
+    else:
+        html = renderer.render(text, safe_mode)
+
+    __metrics.observe(__metrics.transform_render, time.perf_counter() - t0)
     cache.add_html(hash_val, f"markdown_transformer:{hash_val}", html)
 
     return html
 
 
+def render(text, safe_mode=True):
+    """
+    Converts markdown to HTML with the current renderer, without consulting the cache.
+    """
+    return __rendering.get_renderer().render(text, safe_mode)
+
+
+def set_fragments_enabled(enabled: bool):
+    global __fragments_enabled
+    __fragments_enabled = bool(enabled)
+
+
+def is_fragments_enabled() -> bool:
+    return __fragments_enabled
+
+
+def split_blocks(text: str) -> Optional[List[str]]:
+    """
+    Splits markdown at blank lines that end a top-level block. Fenced code, list items,
+    indented continuations, and block quotes stay whole. Returns None when the document
+    has constructs that can't be rendered a block at a time.
+    """
+    if __whole_document_pattern.search(text):
+        return None
+
+    # Each block with the blank lines that came before it, kept for blocks that are merged back.
+    blocks: List[Tuple[List[str], List[str]]] = []
+    current: List[str] = []
+    separator: List[str] = []
+    fence = None
+
+    for line in text.split('\n'):
+        if fence:
+            current.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+            continue
+
+        match = __fence_pattern.match(line)
+        if match:
+            fence = match.group(1)[0] * 3
+
+        if line.strip():
+            current.append(line)
+            continue
+
+        if current:
+            blocks.append((separator, current))
+            current = []
+            separator = []
+        separator.append(line)
+
+    if current:
+        blocks.append((separator, current))
+
+    merged: List[List[str]] = []
+    for separator, block in blocks:
+        if merged and __continues(merged[-1], block):
+            merged[-1].extend([*separator, *block])
+        else:
+            merged.append(block)
+
+    return ['\n'.join(block) for block in merged]
+
+
 def get_hash(text):
     md5 = hashlib.md5()
     data = text.encode('utf-8')
     md5.update(data)
 
     return md5.hexdigest()
+
+
+def __transform_block(block: str, safe_mode: bool, renderer, cache) -> str:
+    key = f'block: {renderer.name}:{get_hash(block)}'
+    entry = cache.get_html(key)
+    if entry:
+        __metrics.increment(__metrics.fragment_cache_hits)
+        return entry.contents
+
+    __metrics.increment(__metrics.fragment_cache_misses)
+    html = renderer.render(block, safe_mode)
+    cache.add_html(key, "markdown_transformer:block", html)
+
+    return html
+
+
+def __continues(previous: List[str], block: List[str]) -> bool:
+    first = block[0]
+    if first[0] in ' \t':
+        # Indented text belongs to the list item or code block before it.
+        return True
+    if first.lstrip().startswith('>') and previous[0].lstrip().startswith('>'):
+        return True
+
+    return bool(__list_pattern.match(first) and __list_pattern.match(previous[0]))
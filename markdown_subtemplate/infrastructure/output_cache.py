@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from markdown_subtemplate import caching as __caching
+from markdown_subtemplate import metrics as __metrics
+from markdown_subtemplate.exceptions import ArgumentExpectedException
+from markdown_subtemplate.infrastructure.compiled_template import CompiledTemplate
+
+# Opt-in: final page output memoized per template and the values data puts in its slots,
+# least recently used entries are evicted first. Pages data doesn't change are never stored,
+# their compiled HTML is already returned as is.
+__enabled = False
+__max_entries: Optional[int] = 1000
+__max_bytes: Optional[int] = None
+
+__lock = threading.Lock()
+# (cache namespace, template_path, slot values) -> (compiled page the output came from, output), oldest first.
+__outputs: 'OrderedDict[Tuple[Optional[str], str, Tuple[Optional[str], ...]], Tuple[CompiledTemplate, str]]' = \
+    OrderedDict()
+__total_bytes = 0
+__excluded: Set[str] = set()
+
+
+def enable(max_entries: Optional[int] = 1000, max_bytes: Optional[int] = None):
+    global __enabled, __max_entries, __max_bytes
+
+    if max_entries is not None and max_entries < 1:
+        raise ArgumentExpectedException('max_entries')
+    if max_bytes is not None and max_bytes < 1:
+        raise ArgumentExpectedException('max_bytes')
+
+    __max_entries = max_entries
+    __max_bytes = max_bytes
+    __enabled = True
+
+    with __lock:
+        __evict()
+
+
+def disable():
+    global __enabled
+
+    __enabled = False
+    clear()
+
+
+def is_enabled() -> bool:
+    return __enabled
+
+
+def set_excluded(template_path: str, excluded: bool = True):
+    template_path = template_path.strip().lower()
+
+    with __lock:
+        if excluded:
+            __excluded.add(template_path)
+            __remove_page(template_path)
+        else:
+            __excluded.discard(template_path)
+
+
+def render(template_path: str, compiled: CompiledTemplate, data: Dict[str, Any]) -> str:
+    if not __enabled or template_path in __excluded:
+        return compiled.render(data)
+
+    values = tuple(compiled.get_slot_values(data))
+    if all(value is None for value in values):
+        return compiled.render(data)
+
+    key = (__caching.get_namespace(), template_path, values)
+    with __lock:
+        memo = __outputs.get(key)
+        # Output of a page that has since been regenerated doesn't count.
+        if memo is not None and memo[0] is compiled:
+            __outputs.move_to_end(key)
+            __metrics.increment(__metrics.output_cache_hits)
+            return memo[1]
+
+    __metrics.increment(__metrics.output_cache_misses)
+    html = compiled.render(data)
+    __add(key, compiled, html)
+
+    return html
+
+
+def forget(template_path: str):
+    with __lock:
+        __remove_page(template_path)
+
+
+def forget_prefix(prefix: str):
+    global __total_bytes
+
+    with __lock:
+        for key in [k for k in __outputs if k[1].startswith(prefix)]:
+            __total_bytes -= len(__outputs.pop(key)[1])
+
+
+def clear(namespace: Optional[str] = None):
+    """
+    Drops the outputs of one cache namespace, or of all of them when namespace is None.
+    """
+    global __total_bytes
+
+    with __lock:
+        if namespace is None:
+            __outputs.clear()
+            __total_bytes = 0
+            return
+
+        for key in [k for k in __outputs if k[0] == namespace]:
+            __total_bytes -= len(__outputs.pop(key)[1])
+
+
+def stats() -> Dict[str, int]:
+    with __lock:
+        return {'count': len(__outputs), 'bytes': __total_bytes}
+
+
+def __add(key: Tuple[Optional[str], str, Tuple[Optional[str], ...]], compiled: CompiledTemplate, html: str):
+    global __total_bytes
+
+    with __lock:
+        old = __outputs.pop(key, None)
+        if old is not None:
+            __total_bytes -= len(old[1])
+
+        __outputs[key] = (compiled, html)
+        __total_bytes += len(html)
+        __evict()
+
+
+def __evict():
+    global __total_bytes
+
+    while __outputs and ((__max_entries is not None and len(__outputs) > __max_entries) or
+                         (__max_bytes is not None and __total_bytes > __max_bytes)):
+        _, (_, html) = __outputs.popitem(last=False)
+        __total_bytes -= len(html)
+
+
+def __remove_page(template_path: str):
+    global __total_bytes
+
+    for key in [k for k in __outputs if k[1] == template_path]:
+        __total_bytes -= len(__outputs.pop(key)[1])
@@ -1,18 +1,87 @@
 import os
-import datetime
-from typing import Dict, Optional, Any, List
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, Optional, Any, List, Iterator, Union
 
 from markdown_subtemplate import caching as __caching
-from markdown_subtemplate.infrastructure import markdown_transformer
-from markdown_subtemplate.exceptions import ArgumentExpectedException, TemplateNotFoundException
+from markdown_subtemplate.infrastructure import markdown_transformer, compiled_template, change_tracking, \
+    dependency_graph, output_cache
+from markdown_subtemplate.infrastructure.compiled_template import CompiledTemplate
+from markdown_subtemplate.exceptions import ArgumentExpectedException, TemplateNotFoundException, \
+    ImportCycleException, ImportDepthException
 from markdown_subtemplate import logging as __logging
+from markdown_subtemplate import metrics as __metrics
 import markdown_subtemplate.storage as __storage
-from markdown_subtemplate.logging import SubtemplateLogger
+from markdown_subtemplate.logging import SubtemplateLogger, LogLevel
 from markdown_subtemplate.storage import SubtemplateStorage
 
+__max_import_depth = 25
+
+PageMeta = namedtuple("PageMeta", "html, etag, last_modified")
+
 
-# noinspection DuplicatedCode
 def get_page(template_path: str, data: Dict[str, Any]) -> str:
+    compiled = get_compiled_page(template_path)
+    return output_cache.render(template_path.strip().lower(), compiled, data)
+
+
+def get_page_bytes(template_path: str, data: Dict[str, Any], buffers: bool = False) -> Union[bytes, List[bytes]]:
+    compiled = get_compiled_page(template_path)
+    return compiled.render_buffers(data) if buffers else compiled.render_bytes(data)
+
+
+def get_page_compressed(template_path: str, data: Dict[str, Any], encoding: str) -> bytes:
+    return get_compiled_page(template_path).render_compressed(data, encoding)
+
+
+def get_page_stream(template_path: str, data: Dict[str, Any]) -> Iterator[str]:
+    # Resolve the page up front so missing templates raise here, not on the first chunk.
+    return get_compiled_page(template_path).iter_render(data)
+
+
+def get_page_stream_bytes(template_path: str, data: Dict[str, Any]) -> Iterator[bytes]:
+    return get_compiled_page(template_path).iter_render_bytes(data)
+
+
+def get_page_with_meta(template_path: str, data: Dict[str, Any]) -> PageMeta:
+    compiled = get_compiled_page(template_path)
+    return PageMeta(
+        html=compiled.render(data),
+        etag=compiled.get_etag(data),
+        last_modified=get_last_modified(template_path, compiled))
+
+
+def get_page_meta(template_path: str, data: Dict[str, Any]) -> PageMeta:
+    # For conditional requests: no HTML is built, a 304 only needs the validators.
+    compiled = get_compiled_page(template_path)
+    return PageMeta(
+        html=None,
+        etag=compiled.get_etag(data),
+        last_modified=get_last_modified(template_path, compiled))
+
+
+def get_last_modified(template_path: str, compiled: CompiledTemplate) -> Optional[datetime]:
+    """
+    The newest modification time of the template and the imports it used when it was rendered,
+    looked up once per compiled page. None when the storage engine does not report times.
+    """
+    if compiled.last_modified is not None:
+        return compiled.last_modified
+
+    template_path = template_path.strip().lower()
+    store: SubtemplateStorage = __storage.get_storage()
+
+    times = [store.get_markdown_modified(template_path)]
+    times.extend(store.get_shared_modified(name) for name in dependency_graph.get_imports_of(template_path))
+    times = [t for t in times if t is not None]
+
+    compiled.last_modified = max(times) if times else None
+    return compiled.last_modified
+
+
+# noinspection DuplicatedCode
+def get_compiled_page(template_path: str) -> CompiledTemplate:
     if not template_path or not template_path.strip():
         raise ArgumentExpectedException('template_path')
 
@@ -21,20 +90,29 @@ def get_page(template_path: str, data: Dict[str, Any]) -> str:
     cache = __caching.get_cache()
     log = __logging.get_log()
 
+    if change_tracking.is_stale(template_path):
+        invalidate_page(template_path)
+
     key = f'html: {template_path}'
     entry = cache.get_html(key)
     if entry:
-        log.trace(f"CACHE HIT: Reusing {template_path} from HTML cache.")
-        contents = entry.contents
+        __metrics.increment(__metrics.html_cache_hits)
+        if log.is_enabled(LogLevel.trace):
+            log.trace(f"CACHE HIT: Reusing {template_path} from HTML cache.")
+        return compiled_template.get_compiled(key, entry.contents)
+
+    __metrics.increment(__metrics.html_cache_misses)
 
-        # Is there data that needs to be folded in? Process it.
-        if data:
-            contents = process_variables(contents, data)
+    # Concurrent misses for this page wait for one render rather than each running markdown2.
+    entry = cache.get_or_add_html(key, key, lambda: __render_html(template_path), missed=True)
 
-        # Return the cached data, no need to transform for variables.
-        return contents
+    # The passed variables are replaced each time from the compiled form.
+    return compiled_template.get_compiled(key, entry.contents)
 
-    t0 = datetime.datetime.now()
+
+def __render_html(template_path: str) -> str:
+    log = __logging.get_log()
+    t0 = time.perf_counter()
 
     # Get the markdown with imports and substitutions
     markdown = get_markdown(template_path)
@@ -45,19 +123,84 @@ def get_page(template_path: str, data: Dict[str, Any]) -> str:
 
     # Cache inline variables, but not the passed in data as that varies per request (query string, etc).
     html = process_variables(html, inline_variables)
-    cache.add_html(key, key, html)
 
-    # Replace the passed variables each time.
-    html = process_variables(html, data)
+    dt = time.perf_counter() - t0
+    __metrics.observe(__metrics.render_cold, dt)
 
-    dt = datetime.datetime.now() - t0
-
-    msg = f"Created contents for {template_path}:{data} in {int(dt.total_seconds() * 1000):,} ms."
+    msg = f"Created contents for {template_path} in {int(dt * 1000):,} ms."
     log.info(f"GENERATING HTML: {msg}")
 
     return html
 
 
+def invalidate_page(template_path: str):
+    log = __logging.get_log()
+
+    html_key = f'html: {template_path}'
+    markdown_key = f'markdown: {template_path}'
+
+    # Every namespace reads the same templates, so every namespace's copy is stale.
+    for cache in __caching.get_caches():
+        try:
+            cache.remove_html(html_key)
+            cache.remove_markdown(markdown_key)
+        except NotImplementedError:
+            log.info(f"Cache cannot remove single entries, clearing it to invalidate {template_path}.")
+            cache.clear()
+            compiled_template.clear()
+
+    compiled_template.remove(html_key)
+    output_cache.forget(template_path)
+    change_tracking.forget(template_path)
+
+    if log.is_enabled(LogLevel.trace):
+        log.trace(f"INVALIDATED: {template_path} will be regenerated on next use.")
+
+
+def invalidate_prefix(prefix: str) -> int:
+    """
+    Invalidates every page whose template path starts with prefix, returns the number of cached
+    pages removed. Caches that can't remove by prefix drop the matching pages loaded by this process.
+    """
+    html_prefix = f'html: {prefix}'
+    markdown_prefix = f'markdown: {prefix}'
+    pages = [p for p in dependency_graph.get_pages() if p.startswith(prefix)]
+
+    removed = 0
+    for cache in __caching.get_caches():
+        try:
+            removed += cache.remove_html_prefix(html_prefix)
+        except NotImplementedError:
+            removed += __remove_pages(cache, pages, 'html')
+
+        # Only HTML entries are counted, each page has one.
+        try:
+            cache.remove_markdown_prefix(markdown_prefix)
+        except NotImplementedError:
+            __remove_pages(cache, pages, 'markdown')
+
+    compiled_template.remove_prefix(html_prefix)
+    output_cache.forget_prefix(prefix)
+    for template_path in pages:
+        change_tracking.forget(template_path)
+
+    return removed
+
+
+def __remove_pages(cache: __caching.SubtemplateCache, pages: List[str], kind: str) -> int:
+    log = __logging.get_log()
+    remove = cache.remove_html if kind == 'html' else cache.remove_markdown
+
+    try:
+        return sum(1 for template_path in pages if remove(f'{kind}: {template_path}'))
+    except NotImplementedError:
+        log.info(f"Cache cannot remove single entries, clearing it to invalidate {len(pages):,} pages.")
+        cache.clear()
+        compiled_template.clear()
+
+        return len(pages)
+
+
 def get_html(markdown_text: str, unsafe_data=False) -> str:
     html = markdown_transformer.transform(markdown_text, unsafe_data)
     return html
@@ -71,43 +214,53 @@ def get_markdown(template_path: str, data: Dict[str, Any] = None) -> str:
     cache = __caching.get_cache()
     log = __logging.get_log()
 
+    if change_tracking.is_stale(template_path):
+        invalidate_page(template_path)
+
     key = f'markdown: {template_path}'
     entry = cache.get_markdown(key)
     if entry:
-        log.trace(f"CACHE HIT: Reusing {template_path} from MARKDOWN cache.")
+        __metrics.increment(__metrics.markdown_cache_hits)
+        if log.is_enabled(LogLevel.trace):
+            log.trace(f"CACHE HIT: Reusing {template_path} from MARKDOWN cache.")
         if not data:
             return entry.contents
         else:
             return process_variables(entry.contents, data)
 
-    t0 = datetime.datetime.now()
+    __metrics.increment(__metrics.markdown_cache_misses)
+    t0 = time.perf_counter()
 
-    text = load_markdown_contents(template_path)
+    imports = []
+    text = load_markdown_contents(template_path, imports)
     cache.add_markdown(key, key, text)
+    dependency_graph.record(template_path, imports)
+    change_tracking.track(template_path, imports)
     if data:
         text = process_variables(text, data)
 
-    dt = datetime.datetime.now() - t0
-
-    msg = f"Created contents for {template_path} in {int(dt.total_seconds() * 1000):,} ms."
-    log.trace(f"GENERATING MARKDOWN: {msg}")
+    if log.is_enabled(LogLevel.trace):
+        dt = time.perf_counter() - t0
+        msg = f"Created contents for {template_path} in {int(dt * 1000):,} ms."
+        log.trace(f"GENERATING MARKDOWN: {msg}")
 
     return text
 
 
-def load_markdown_contents(template_path: str) -> Optional[str]:
+def load_markdown_contents(template_path: str, imports: List[str] = None) -> Optional[str]:
     if not template_path:
         return ''
 
     log = __logging.get_log()
-    log.verbose(f"Loading markdown template: {template_path}")
+    if log.is_enabled(LogLevel.verbose):
+        log.verbose(f"Loading markdown template: {template_path}")
 
     page_md = get_page_markdown(template_path)
     if not page_md:
         return ''
 
     lines = page_md.split('\n')
-    lines = process_imports(lines)
+    lines = process_imports(lines, imports)
 
     final_markdown = "\n".join(lines).strip()
 
@@ -119,6 +272,7 @@ def get_page_markdown(template_path: str) -> Optional[str]:
         raise TemplateNotFoundException("No template file specified: template_path=''.")
 
     store: SubtemplateStorage = __storage.get_storage()
+    __metrics.increment(__metrics.storage_reads)
     return store.get_markdown_text(template_path)
 
 
@@ -127,15 +281,39 @@ def get_shared_markdown(import_name: str) -> Optional[str]:
         raise ArgumentExpectedException('import_name')
 
     store: SubtemplateStorage = __storage.get_storage()
+    __metrics.increment(__metrics.storage_reads)
     return store.get_shared_markdown(import_name)
 
 
-def process_imports(lines: List[str]) -> List[str]:
+def process_imports(lines: List[str], imports: List[str] = None, max_depth: Optional[int] = None,
+                    shared_markdown: Dict[str, Optional[str]] = None) -> List[str]:
+    """
+    Expands [IMPORT ...] statements, including nested ones. shared_markdown can hold
+    already fetched imports keyed by lower case name; others are read from storage.
+    """
     log = __logging.get_log()
-    line_data = list(lines)
+    if max_depth is None:
+        max_depth = __max_import_depth
+    if shared_markdown is None:
+        shared_markdown = {}
+
+    final_lines: List[str] = []
+    # Each shared import is fetched and split once per render, however often it is used.
+    shared_lines: Dict[str, List[str]] = {}
+    # The imports currently being expanded, outermost first, parallel to the frames below the page.
+    import_chain: List[str] = []
+    frames = [iter(lines)]
+
+    while frames:
+        line = next(frames[-1], None)
+        if line is None:
+            frames.pop()
+            if import_chain:
+                import_chain.pop()
+            continue
 
-    for idx, line in enumerate(line_data):
         if not line.strip().startswith('[IMPORT '):
+            final_lines.append(line)
             continue
 
         import_statement = line.strip()
@@ -143,20 +321,57 @@ def process_imports(lines: List[str]) -> List[str]:
             .replace('[IMPORT ', '') \
             .replace(']', '') \
             .strip()
+        import_key = import_name.lower()
 
-        log.verbose(f"Loading import: {import_name}...")
+        if import_key in import_chain:
+            raise ImportCycleException(import_chain + [import_key])
+        if len(import_chain) >= max_depth:
+            raise ImportDepthException(import_name, max_depth)
+
+        if imports is not None:
+            imports.append(import_name)
+
+        markdown_lines = shared_lines.get(import_key)
+        if markdown_lines is None:
+            if import_key in shared_markdown:
+                markdown = shared_markdown[import_key]
+            else:
+                if log.is_enabled(LogLevel.verbose):
+                    log.verbose(f"Loading import: {import_name}...")
+                markdown = get_shared_markdown(import_name)
+
+            if markdown is not None:
+                markdown_lines = markdown.split('\n')
+            else:
+                markdown_lines = ['', f'ERROR: IMPORT {import_name} not found', '']
+
+            shared_lines[import_key] = markdown_lines
+
+        __metrics.increment(__metrics.imports_expanded)
+        import_chain.append(import_key)
+        frames.append(iter(markdown_lines))
+
+    return final_lines
+
+
+def set_max_import_depth(max_depth: int):
+    global __max_import_depth
+    if not max_depth or max_depth < 1:
+        raise ArgumentExpectedException('max_depth')
+
+    __max_import_depth = max_depth
 
-        markdown = get_shared_markdown(import_name)
-        if markdown is not None:
-            markdown_lines = markdown.split('\n')
-        else:
-            markdown_lines = ['', f'ERROR: IMPORT {import_name} not found', '']
 
-        line_data = line_data[:idx] + markdown_lines + line_data[idx + 1:]
+def get_max_import_depth() -> int:
+    return __max_import_depth
 
-        return process_imports(line_data)
 
-    return line_data
+def find_import_names(markdown: str) -> List[str]:
+    return [
+        line.strip().replace('[IMPORT ', '').replace(']', '').strip()
+        for line in markdown.split('\n')
+        if line.strip().startswith('[IMPORT ')
+    ]
 
 
 def process_variables(raw_text: str, data: Dict[str, Any]) -> str:
@@ -177,7 +392,8 @@ def process_variables(raw_text: str, data: Dict[str, Any]) -> str:
         if key_placeholders[key] not in transformed_text:
             continue
 
-        log.verbose(f"Replacing {key_placeholders[key]}...")
+        if log.is_enabled(LogLevel.verbose):
+            log.verbose(f"Replacing {key_placeholders[key]}...")
         transformed_text = transformed_text.replace(key_placeholders[key], str(data[key]))
 
     return transformed_text
@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from markdown_subtemplate import caching as __caching
+from markdown_subtemplate import logging as __logging
+from markdown_subtemplate import metrics as __metrics
+import markdown_subtemplate.storage as __storage
+from markdown_subtemplate.exceptions import ArgumentExpectedException
+from markdown_subtemplate.logging import LogLevel
+from markdown_subtemplate.infrastructure import page, compiled_template, change_tracking, dependency_graph, \
+    output_cache
+from markdown_subtemplate.infrastructure.compiled_template import CompiledTemplate
+from markdown_subtemplate.storage import AsyncSubtemplateStorage
+
+# Renders in progress per event loop, cache, and cache key, so concurrent misses share one render.
+__in_flight: Dict[Tuple[int, int, str], 'asyncio.Future'] = {}
+
+
+async def get_page_async(template_path: str, data: Dict[str, Any]) -> str:
+    compiled = await get_compiled_page_async(template_path)
+    return output_cache.render(template_path.strip().lower(), compiled, data)
+
+
+# noinspection DuplicatedCode
+async def get_compiled_page_async(template_path: str) -> CompiledTemplate:
+    if not template_path or not template_path.strip():
+        raise ArgumentExpectedException('template_path')
+
+    template_path = template_path.strip().lower()
+
+    cache = __caching.get_cache()
+    log = __logging.get_log()
+
+    if change_tracking.is_stale(template_path):
+        page.invalidate_page(template_path)
+
+    key = f'html: {template_path}'
+    entry = cache.get_html(key)
+    if entry:
+        __metrics.increment(__metrics.html_cache_hits)
+        if log.is_enabled(LogLevel.trace):
+            log.trace(f"CACHE HIT: Reusing {template_path} from HTML cache.")
+        return compiled_template.get_compiled(key, entry.contents)
+
+    __metrics.increment(__metrics.html_cache_misses)
+    flight_key = (id(asyncio.get_event_loop()), id(cache), key)
+    task = __in_flight.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(__render_and_cache(template_path, key))
+        __in_flight[flight_key] = task
+        task.add_done_callback(lambda _: __in_flight.pop(flight_key, None))
+
+    # Shielded so a cancelled request does not cancel the render other requests wait on.
+    html = await asyncio.shield(task)
+
+    return compiled_template.get_compiled(key, html)
+
+
+async def __render_and_cache(template_path: str, key: str) -> str:
+    cache = __caching.get_cache()
+    log = __logging.get_log()
+    t0 = time.perf_counter()
+
+    markdown = await get_markdown_async(template_path)
+    inline_variables = {}
+    markdown = page.get_inline_variables(markdown, inline_variables, log)
+
+    # markdown2 is CPU bound, keep it off the event loop. The context carries the cache namespace along.
+    loop = asyncio.get_event_loop()
+    html = await loop.run_in_executor(None, contextvars.copy_context().run, page.get_html, markdown)
+
+    html = page.process_variables(html, inline_variables)
+    cache.add_html(key, key, html)
+
+    dt = time.perf_counter() - t0
+    __metrics.observe(__metrics.render_cold, dt)
+
+    msg = f"Created contents for {template_path} in {int(dt * 1000):,} ms."
+    log.info(f"GENERATING HTML (async): {msg}")
+
+    return html
+
+
+# noinspection DuplicatedCode
+async def get_markdown_async(template_path: str) -> str:
+    cache = __caching.get_cache()
+    log = __logging.get_log()
+
+    if change_tracking.is_stale(template_path):
+        page.invalidate_page(template_path)
+
+    key = f'markdown: {template_path}'
+    entry = cache.get_markdown(key)
+    if entry:
+        __metrics.increment(__metrics.markdown_cache_hits)
+        if log.is_enabled(LogLevel.trace):
+            log.trace(f"CACHE HIT: Reusing {template_path} from MARKDOWN cache.")
+        return entry.contents
+
+    __metrics.increment(__metrics.markdown_cache_misses)
+
+    imports = []
+    text = await load_markdown_contents_async(template_path, imports)
+    cache.add_markdown(key, key, text)
+    dependency_graph.record(template_path, imports)
+    change_tracking.track(template_path, imports)
+
+    return text
+
+
+async def load_markdown_contents_async(template_path: str, imports: List[str] = None) -> str:
+    if not template_path:
+        return ''
+
+    log = __logging.get_log()
+    if log.is_enabled(LogLevel.verbose):
+        log.verbose(f"Loading markdown template (async): {template_path}")
+
+    store: AsyncSubtemplateStorage = __storage.get_async_storage()
+    __metrics.increment(__metrics.storage_reads)
+    page_md = await store.get_markdown_text(template_path)
+    if not page_md:
+        return ''
+
+    shared_markdown = await fetch_imports(page_md, store)
+    lines = page.process_imports(page_md.split('\n'), imports, shared_markdown=shared_markdown)
+
+    return "\n".join(lines).strip()
+
+
+async def fetch_imports(markdown: str, store: AsyncSubtemplateStorage) -> Dict[str, Optional[str]]:
+    """
+    Fetches every import reachable from markdown, one concurrent batch per nesting level.
+    Returns the text of each import keyed by its lower case name.
+    """
+    fetched: Dict[str, Optional[str]] = {}
+    pending = page.find_import_names(markdown)
+
+    while pending:
+        names = {}
+        for name in pending:
+            if name.lower() not in fetched:
+                names.setdefault(name.lower(), name)
+        if not names:
+            break
+
+        __metrics.increment(__metrics.storage_reads, len(names))
+        results = await asyncio.gather(*(store.get_shared_markdown(name) for name in names.values()))
+
+        pending = []
+        for import_key, text in zip(names, results):
+            fetched[import_key] = text
+            if text:
+                pending.extend(page.find_import_names(text))
+
+    return fetched
@@ -0,0 +1,103 @@
+import concurrent.futures
+import pickle
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from markdown_subtemplate import caching as __caching
+from markdown_subtemplate import logging as __logging
+from markdown_subtemplate import rendering
+from markdown_subtemplate.exceptions import MarkdownTemplateException
+from markdown_subtemplate.infrastructure import page, markdown_transformer, compiled_template, \
+    change_tracking, dependency_graph
+from markdown_subtemplate.storage.file_storage import FileStore
+
+WarmUpResult = namedtuple("WarmUpResult", "pages, errors, seconds")
+
+# template_path, markdown, imports, html, error
+RenderResult = Tuple[str, Optional[str], List[str], Optional[str], Optional[str]]
+
+
+def warm_up(template_paths: List[str], workers: Optional[int] = None) -> WarmUpResult:
+    """
+    Renders the templates in a process pool and stores the results in the current process' cache.
+    Each page is rendered from scratch in the workers, only the final markdown and HTML come back.
+    With workers=1 everything is rendered in this process.
+    """
+    log = __logging.get_log()
+    cache = __caching.get_cache()
+    t0 = time.perf_counter()
+
+    settings = __get_worker_settings() if workers != 1 and len(template_paths) > 1 else None
+    if settings is None:
+        results = [render_template(p) for p in template_paths]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=__init_worker,
+                initargs=settings) as pool:
+            chunk_size = max(1, len(template_paths) // ((workers or 4) * 4))
+            results = list(pool.map(render_template, template_paths, chunksize=chunk_size))
+
+    errors: Dict[str, str] = {}
+    for template_path, markdown, imports, html, error in results:
+        if error:
+            errors[template_path] = error
+            log.error(f"WARM UP: Could not render {template_path}: {error}")
+            continue
+
+        markdown_key = f'markdown: {template_path}'
+        html_key = f'html: {template_path}'
+
+        cache.add_markdown(markdown_key, markdown_key, markdown)
+        cache.add_html(html_key, html_key, html)
+        compiled_template.get_compiled(html_key, html)
+        dependency_graph.record(template_path, imports)
+        change_tracking.track(template_path, imports)
+
+    dt = time.perf_counter() - t0
+    pages = len(results) - len(errors)
+    log.info(f"WARM UP: Rendered {pages:,} pages in {dt:,.2f} sec with {len(errors):,} errors.")
+
+    return WarmUpResult(pages=pages, errors=errors, seconds=dt)
+
+
+def __get_worker_settings() -> Optional[Tuple[Optional[str], bytes, int]]:
+    # Workers that are spawned rather than forked start with default settings, so they are passed along.
+    # A renderer that can't be pickled can't be passed, its pages are rendered in this process instead.
+    try:
+        renderer = pickle.dumps(rendering.get_renderer())
+    except (pickle.PicklingError, TypeError, AttributeError) as x:
+        __logging.get_log().info(f"WARM UP: Renderer cannot be sent to worker processes ({x}), "
+                                 f"rendering in this process.")
+        return None
+
+    return FileStore.get_template_folder(), renderer, page.get_max_import_depth()
+
+
+def __init_worker(template_folder: Optional[str], renderer: bytes, max_import_depth: int):
+    if template_folder and FileStore.get_template_folder() != template_folder:
+        FileStore.set_template_folder(template_folder)
+
+    rendering.set_renderer(pickle.loads(renderer))
+    page.set_max_import_depth(max_import_depth)
+
+
+def render_template(template_path: str) -> RenderResult:
+    """
+    Renders a page from scratch without touching the cache. Errors are returned, not raised.
+    """
+    template_path = template_path.strip().lower()
+
+    try:
+        imports = []
+        markdown = page.load_markdown_contents(template_path, imports)
+
+        inline_variables = {}
+        text = page.get_inline_variables(markdown, inline_variables, None)
+        html = markdown_transformer.render(text, safe_mode=False) if text else text
+        html = page.process_variables(str(html), inline_variables)
+
+        return template_path, markdown, imports, html, None
+    except MarkdownTemplateException as x:
+        return template_path, None, [], None, str(x)
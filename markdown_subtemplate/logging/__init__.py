@@ -1,6 +1,7 @@
 from .log_level import LogLevel
 from .stdout_logger import StdOutLogger
 from .null_logger import NullLogger
+from .stdlib_logger import StdLibLogger
 from .subtemplate_logger import SubtemplateLogger
 
 from ..exceptions import MarkdownTemplateException
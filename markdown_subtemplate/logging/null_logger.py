@@ -6,6 +6,9 @@ class NullLogger(SubtemplateLogger):
     def __init__(self):
         super().__init__(LogLevel.error)
 
+    def is_enabled(self, level: int) -> bool:
+        return False
+
     def verbose(self, text: str):
         pass
 
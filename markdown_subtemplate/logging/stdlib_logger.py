@@ -0,0 +1,44 @@
+import logging
+from typing import Optional
+
+from .log_level import LogLevel
+from .subtemplate_logger import SubtemplateLogger
+
+
+class StdLibLogger(SubtemplateLogger):
+    """
+    Forwards messages to the standard library's logging module, so handlers, formatting,
+    and filtering are whatever your application configured. The log level defaults to
+    verbose, leaving the filtering to the stdlib logger's own level.
+    """
+    levels = {
+        LogLevel.verbose: logging.DEBUG,
+        LogLevel.trace: logging.DEBUG,
+        LogLevel.info: logging.INFO,
+        LogLevel.error: logging.ERROR,
+    }
+
+    def __init__(self, log_level: int = LogLevel.verbose, logger: Optional[logging.Logger] = None):
+        super().__init__(log_level)
+        self.logger = logger or logging.getLogger('markdown_subtemplate')
+
+    def is_enabled(self, level: int) -> bool:
+        return super().is_enabled(level) and self.logger.isEnabledFor(self.levels.get(level, logging.ERROR))
+
+    def verbose(self, text: str):
+        self._publish(text, LogLevel.verbose)
+
+    def trace(self, text: str):
+        self._publish(text, LogLevel.trace)
+
+    def info(self, text: str):
+        self._publish(text, LogLevel.info)
+
+    def error(self, text: str):
+        self._publish(text, LogLevel.error)
+
+    def _publish(self, text: str, level: int):
+        if not self.should_log(level, text):
+            return
+
+        self.logger.log(self.levels[level], text)
@@ -22,5 +22,16 @@ class SubtemplateLogger(abc.ABC):
     def error(self, text: str):
         pass
 
+    def is_enabled(self, level: int) -> bool:
+        """
+        Whether messages at this level are logged at all. Check it before building
+        an expensive message, e.g. an f-string on every request.
+        """
+        return self.log_level <= level
+
     def should_log(self, level: int, text: str) -> bool:
-        return self.log_level <= level and (text and text.strip())
+        # Cheap level check first, only then look at the message.
+        if not self.is_enabled(level):
+            return False
+
+        return bool(text) and not text.isspace()
@@ -0,0 +1,133 @@
+import threading
+from typing import Any, Dict, List, Tuple
+
+from .histogram import Histogram
+from .metrics_sink import MetricsSink
+from .null_sink import NullMetricsSink
+
+from ..exceptions import ArgumentExpectedException
+
+# Counters
+html_cache_hits = 'html_cache.hits'
+html_cache_misses = 'html_cache.misses'
+markdown_cache_hits = 'markdown_cache.hits'
+markdown_cache_misses = 'markdown_cache.misses'
+transform_cache_hits = 'transform_cache.hits'
+transform_cache_misses = 'transform_cache.misses'
+fragment_cache_hits = 'fragment_cache.hits'
+fragment_cache_misses = 'fragment_cache.misses'
+output_cache_hits = 'output_cache.hits'
+output_cache_misses = 'output_cache.misses'
+storage_reads = 'storage.reads'
+imports_expanded = 'imports.expanded'
+
+# Latency histograms
+render_cold = 'render.cold'
+transform_render = 'transform.render'
+
+__sink: MetricsSink = NullMetricsSink()
+__lock = threading.Lock()
+__histograms: Dict[str, Histogram] = {}
+
+# Counters are kept per thread so cache hits don't contend on a lock, get_stats() adds them up.
+# Each thread registers its counters once; reset() starts a new generation, which makes every
+# thread register fresh counters on its next increment.
+__local = threading.local()
+__generation = 0
+__thread_counters: List[Tuple[threading.Thread, Dict[str, int]]] = []
+# Counts of threads that have finished.
+__finished_counters: Dict[str, int] = {}
+
+
+def increment(name: str, value: int = 1):
+    counters = getattr(__local, 'counters', None)
+    if counters is None or __local.generation != __generation:
+        counters = __register_thread()
+
+    counters[name] = counters.get(name, 0) + value
+
+    __sink.increment(name, value)
+
+
+def observe(name: str, seconds: float):
+    with __lock:
+        histogram = __histograms.get(name)
+        if histogram is None:
+            histogram = __histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    __sink.observe(name, seconds)
+
+
+def get_stats() -> Dict[str, Any]:
+    with __lock:
+        counters = __merge_counters()
+        histograms = {name: h.to_dict() for name, h in __histograms.items()}
+
+    ratios = {}
+    for cache in ('html_cache', 'markdown_cache', 'transform_cache', 'fragment_cache', 'output_cache'):
+        hits = counters.get(f'{cache}.hits', 0)
+        total = hits + counters.get(f'{cache}.misses', 0)
+        ratios[f'{cache}.hit_ratio'] = hits / total if total else None
+
+    return {'counters': counters, 'ratios': ratios, 'histograms': histograms}
+
+
+def reset():
+    global __generation
+
+    with __lock:
+        __generation += 1
+        __thread_counters.clear()
+        __finished_counters.clear()
+        __histograms.clear()
+
+
+def set_sink(sink: MetricsSink):
+    global __sink
+    if not sink or not isinstance(sink, MetricsSink):
+        raise ArgumentExpectedException('sink')
+
+    __sink = sink
+
+
+def get_sink() -> MetricsSink:
+    return __sink
+
+
+def __register_thread() -> Dict[str, int]:
+    counters: Dict[str, int] = {}
+    with __lock:
+        # Servers that start a thread per request would otherwise keep every thread ever seen.
+        __fold_finished_threads()
+        __local.counters = counters
+        __local.generation = __generation
+        __thread_counters.append((threading.current_thread(), counters))
+
+    return counters
+
+
+def __merge_counters() -> Dict[str, int]:
+    # Called with the lock held. Copying a dict is atomic, so the owning thread can keep counting.
+    __fold_finished_threads()
+
+    total = dict(__finished_counters)
+    for _, counters in __thread_counters:
+        for name, value in dict(counters).items():
+            total[name] = total.get(name, 0) + value
+
+    return total
+
+
+def __fold_finished_threads():
+    # Called with the lock held. A finished thread can't count anymore, its counters are final.
+    running = []
+    for thread, counters in __thread_counters:
+        if thread.is_alive():
+            running.append((thread, counters))
+            continue
+
+        for name, value in counters.items():
+            __finished_counters[name] = __finished_counters.get(name, 0) + value
+
+    __thread_counters[:] = running
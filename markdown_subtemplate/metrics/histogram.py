@@ -0,0 +1,33 @@
+import bisect
+from typing import Any, Dict, List
+
+
+class Histogram:
+    # Upper bounds of the buckets in milliseconds, anything slower goes in the last (+inf) bucket.
+    bucket_bounds_ms: List[float] = [0.1, 0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.bucket_bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        self.buckets[bisect.bisect_left(self.bucket_bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.min_ms = ms if self.min_ms is None else min(self.min_ms, ms)
+        self.max_ms = ms if self.max_ms is None else max(self.max_ms, ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f'<={b}ms' for b in self.bucket_bounds_ms] + ['+inf']
+        return {
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.count if self.count else None,
+            'min_ms': self.min_ms,
+            'max_ms': self.max_ms,
+            'buckets': dict(zip(labels, self.buckets)),
+        }
@@ -0,0 +1,16 @@
+import abc
+
+
+class MetricsSink(abc.ABC):
+    """
+    Receives every metric as it is recorded, e.g. to forward it to statsd or Prometheus.
+    Called on the render path, so implementations should be quick and non-blocking.
+    """
+
+    @abc.abstractmethod
+    def increment(self, name: str, value: int):
+        pass
+
+    @abc.abstractmethod
+    def observe(self, name: str, seconds: float):
+        pass
@@ -0,0 +1,9 @@
+from .metrics_sink import MetricsSink
+
+
+class NullMetricsSink(MetricsSink):
+    def increment(self, name: str, value: int):
+        pass
+
+    def observe(self, name: str, seconds: float):
+        pass
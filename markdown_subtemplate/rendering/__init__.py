@@ -0,0 +1,23 @@
+from .markdown_renderer import MarkdownRenderer
+from .markdown2_renderer import Markdown2Renderer
+from .cmark_renderer import CmarkRenderer
+from .markdown_it_renderer import MarkdownItRenderer
+from ..exceptions import ArgumentExpectedException
+
+__renderer: MarkdownRenderer = Markdown2Renderer()
+
+
+def set_renderer(renderer_instance: MarkdownRenderer):
+    """
+    Changes how markdown is converted to HTML. Pages already cached keep their HTML,
+    call engine.clear_cache() after switching to re-render them.
+    """
+    global __renderer
+    if not renderer_instance or not isinstance(renderer_instance, MarkdownRenderer):
+        raise ArgumentExpectedException('renderer_instance')
+
+    __renderer = renderer_instance
+
+
+def get_renderer() -> MarkdownRenderer:
+    return __renderer
@@ -0,0 +1,23 @@
+from .markdown_renderer import MarkdownRenderer
+from ..exceptions import InvalidOperationException
+
+
+class CmarkRenderer(MarkdownRenderer):
+    """
+    GitHub flavored markdown through the cmark-gfm C library, requires: pip install cmarkgfm
+    """
+    name = 'cmarkgfm'
+
+    def __init__(self):
+        try:
+            import cmarkgfm
+            from cmarkgfm.cmark import Options
+        except ImportError:
+            raise InvalidOperationException("CmarkRenderer requires the cmarkgfm package: pip install cmarkgfm")
+
+        self.cmarkgfm = cmarkgfm
+        self.unsafe_options = Options.CMARK_OPT_UNSAFE
+
+    def render(self, text: str, safe_mode: bool) -> str:
+        options = 0 if safe_mode else self.unsafe_options
+        return self.cmarkgfm.github_flavored_markdown_to_html(text, options=options)
@@ -0,0 +1,18 @@
+import markdown2
+
+from .markdown_renderer import MarkdownRenderer
+
+
+class Markdown2Renderer(MarkdownRenderer):
+    name = 'markdown2'
+
+    # Note: Do NOT enable link-patterns, it causes a crash.
+    enabled_extras = [
+        "cuddled-lists",
+        "code-friendly",
+        "fenced-code-blocks",
+        "tables"
+    ]
+
+    def render(self, text: str, safe_mode: bool) -> str:
+        return markdown2.markdown(text, extras=self.enabled_extras, safe_mode=safe_mode)
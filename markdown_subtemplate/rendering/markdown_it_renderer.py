@@ -0,0 +1,23 @@
+from .markdown_renderer import MarkdownRenderer
+from ..exceptions import InvalidOperationException
+
+
+class MarkdownItRenderer(MarkdownRenderer):
+    """
+    CommonMark plus tables through markdown-it-py, requires: pip install markdown-it-py
+    """
+    name = 'markdown-it-py'
+
+    def __init__(self):
+        try:
+            from markdown_it import MarkdownIt
+        except ImportError:
+            raise InvalidOperationException("MarkdownItRenderer requires the markdown-it-py package: "
+                                            "pip install markdown-it-py")
+
+        self.safe_parser = MarkdownIt('commonmark', {'html': False}).enable('table')
+        self.unsafe_parser = MarkdownIt('commonmark', {'html': True}).enable('table')
+
+    def render(self, text: str, safe_mode: bool) -> str:
+        parser = self.safe_parser if safe_mode else self.unsafe_parser
+        return parser.render(text)
@@ -0,0 +1,10 @@
+import abc
+
+
+class MarkdownRenderer(abc.ABC):
+    # Identifies the renderer, e.g. in cache keys and benchmark results.
+    name = 'renderer'
+
+    @abc.abstractmethod
+    def render(self, text: str, safe_mode: bool) -> str:
+        pass
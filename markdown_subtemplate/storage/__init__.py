@@ -1,8 +1,11 @@
 from markdown_subtemplate.exceptions import ArgumentExpectedException
 from markdown_subtemplate.storage.subtemplate_storage import SubtemplateStorage
+from markdown_subtemplate.storage.async_subtemplate_storage import AsyncSubtemplateStorage, ExecutorStorage
 from markdown_subtemplate.storage import file_storage
+from markdown_subtemplate.storage.bundle_storage import BundleStorage
 
 __storage: SubtemplateStorage = None
+__async_storage: AsyncSubtemplateStorage = None
 
 
 def set_storage(storage_instance: SubtemplateStorage):
@@ -23,3 +26,27 @@ def get_storage() -> SubtemplateStorage:
 
 def is_initialized() -> bool:
     return get_storage().is_initialized()
+
+
+def set_async_storage(storage_instance: AsyncSubtemplateStorage):
+    global __async_storage
+    if not storage_instance or not isinstance(storage_instance, AsyncSubtemplateStorage):
+        raise ArgumentExpectedException('storage_instance')
+
+    __async_storage = storage_instance
+
+
+def clear_async_storage():
+    global __async_storage
+    __async_storage = None
+
+
+def get_async_storage() -> AsyncSubtemplateStorage:
+    # Without a native async engine, run the synchronous one in the default executor.
+    if __async_storage:
+        return __async_storage
+    return ExecutorStorage(get_storage())
+
+
+def is_async_initialized() -> bool:
+    return get_async_storage().is_initialized()
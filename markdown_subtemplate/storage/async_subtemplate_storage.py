@@ -0,0 +1,52 @@
+import abc
+import asyncio
+from typing import Optional
+
+from markdown_subtemplate.storage.subtemplate_storage import SubtemplateStorage
+
+
+class AsyncSubtemplateStorage(abc.ABC):
+    """
+    Optional asyncio counterpart of SubtemplateStorage used by engine.get_page_async().
+    """
+
+    @abc.abstractmethod
+    async def get_markdown_text(self, template_path) -> str:
+        pass
+
+    @abc.abstractmethod
+    async def get_shared_markdown(self, import_name) -> str:
+        pass
+
+    @abc.abstractmethod
+    def is_initialized(self) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def clear_settings(self):
+        pass
+
+
+class ExecutorStorage(AsyncSubtemplateStorage):
+    """
+    Adapts a synchronous storage engine (e.g. FileStore) by running its
+    blocking reads in an executor, the default thread pool unless one is given.
+    """
+
+    def __init__(self, storage: SubtemplateStorage, executor=None):
+        self.storage = storage
+        self.executor = executor
+
+    async def get_markdown_text(self, template_path) -> str:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.storage.get_markdown_text, template_path)
+
+    async def get_shared_markdown(self, import_name) -> Optional[str]:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.storage.get_shared_markdown, import_name)
+
+    def is_initialized(self) -> bool:
+        return self.storage.is_initialized()
+
+    def clear_settings(self):
+        self.storage.clear_settings()
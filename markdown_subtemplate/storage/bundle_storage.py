@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional, Union
+
+from markdown_subtemplate.bundle.bundle_file import BundleFile, normalize_path
+from markdown_subtemplate.exceptions import TemplateNotFoundException
+from . import SubtemplateStorage
+
+
+class BundleStorage(SubtemplateStorage):
+    """
+    Reads templates from a bundle built with `python -m markdown_subtemplate.bundle`.
+    Opening it maps one file and reads its index, templates are decoded when first used.
+    """
+
+    def __init__(self, bundle: Union[str, BundleFile]):
+        self.bundle = bundle if isinstance(bundle, BundleFile) else BundleFile(bundle)
+
+    def get_markdown_text(self, template_path) -> str:
+        text = self.bundle.get('page', normalize_path(template_path or ''))
+        if text is None:
+            raise TemplateNotFoundException(template_path)
+
+        return text
+
+    def get_shared_markdown(self, import_name) -> str:
+        text = self.bundle.get('shared', import_name.strip().lower())
+        if text is None:
+            raise TemplateNotFoundException(f'_shared/{import_name}')
+
+        return text
+
+    def get_markdown_modified(self, template_path) -> Optional[datetime]:
+        return self.bundle.get_modified('page', normalize_path(template_path or ''))
+
+    def get_shared_modified(self, import_name) -> Optional[datetime]:
+        return self.bundle.get_modified('shared', import_name.strip().lower())
+
+    def is_initialized(self) -> bool:
+        return True
+
+    def clear_settings(self):
+        pass
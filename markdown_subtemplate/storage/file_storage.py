@@ -1,5 +1,8 @@
 import os
-from typing import Optional, List
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, List, Tuple
 
 from markdown_subtemplate.exceptions import TemplateNotFoundException, ArgumentExpectedException, \
     InvalidOperationException
@@ -9,33 +12,172 @@ from . import SubtemplateStorage
 class FileStore(SubtemplateStorage):
     __template_folder: Optional[str] = None
 
+    # Optional index of the template tree: lower case full path -> (path on disk, mtime_ns, size).
+    # When enabled, lookups, stamps, and missing templates are answered without touching the disk.
+    __index_enabled = False
+    __index: Dict[str, Tuple[str, int, int]] = {}
+    __index_refresh_seconds: Optional[float] = None
+    __index_built = 0.0
+    __index_lock = threading.Lock()
+
     def get_markdown_text(self, template_path) -> str:
+        return FileStore.read_file(FileStore.get_markdown_file(template_path))
+
+    def get_shared_markdown(self, import_name):
+        return FileStore.read_file(FileStore.get_shared_file(import_name))
+
+    def get_markdown_stamp(self, template_path) -> Optional[Tuple[int, int]]:
+        return FileStore.get_stamp(FileStore.get_markdown_file(template_path))
+
+    def get_shared_stamp(self, import_name) -> Optional[Tuple[int, int]]:
+        return FileStore.get_stamp(FileStore.get_shared_file(import_name))
+
+    def get_markdown_modified(self, template_path) -> Optional[datetime]:
+        return FileStore.get_modified(FileStore.get_markdown_file(template_path))
+
+    def get_shared_modified(self, import_name) -> Optional[datetime]:
+        return FileStore.get_modified(FileStore.get_shared_file(import_name))
+
+    def get_template_paths(self, include_shared: bool = True) -> List[str]:
+        """
+        All markdown templates under the template folder as template paths, e.g. home/index.md.
+        """
+        if not FileStore.__template_folder:
+            raise InvalidOperationException("You must set the template folder before calling this method.")
+
+        parent_folder = os.path.abspath(FileStore.__template_folder)
+        paths = []
+        for folder, dirs, files in os.walk(parent_folder):
+            relative_folder = os.path.relpath(folder, parent_folder)
+            if relative_folder == '.':
+                relative_folder = ''
+                if not include_shared and '_shared' in dirs:
+                    dirs.remove('_shared')
+
+            paths.extend(
+                os.path.join(relative_folder, f).lower()
+                for f in files
+                if f.lower().endswith('.md')
+            )
+
+        return sorted(paths)
+
+    def is_initialized(self) -> bool:
+        return bool(FileStore.__template_folder)
+
+    @staticmethod
+    def get_markdown_file(template_path: str) -> str:
         if not template_path or not template_path.strip():
             raise TemplateNotFoundException("No template file specified: template_path=''.")
 
         file_name = os.path.basename(template_path)
         file_parts = os.path.dirname(template_path).split(os.path.sep)
         folder = FileStore.get_folder(file_parts)
-        full_file = os.path.join(folder, file_name).lower()
 
-        if not os.path.exists(full_file):
+        return os.path.join(folder, file_name).lower()
+
+    @staticmethod
+    def get_shared_file(import_name: str) -> str:
+        folder = FileStore.get_folder(['_shared'])
+        return os.path.join(folder, import_name.strip().lower() + '.md')
+
+    @staticmethod
+    def read_file(full_file: str) -> str:
+        if FileStore.__index_enabled:
+            indexed = FileStore.__get_indexed(full_file)
+            if not indexed:
+                raise TemplateNotFoundException(full_file)
+            full_file = indexed[0]
+        elif not os.path.exists(full_file):
+            raise TemplateNotFoundException(full_file)
+
+        try:
+            with open(full_file, 'r', encoding='utf-8') as fin:
+                return fin.read()
+        except FileNotFoundError:
+            # Deleted since the index was built.
             raise TemplateNotFoundException(full_file)
 
-        with open(full_file, 'r', encoding='utf-8') as fin:
-            return fin.read()
+    @staticmethod
+    def get_stamp(full_file: str) -> Optional[Tuple[int, int]]:
+        if FileStore.__index_enabled:
+            indexed = FileStore.__get_indexed(full_file)
+            return indexed[1:] if indexed else None
 
-    def get_shared_markdown(self, import_name):
-        folder = FileStore.get_folder(['_shared'])
-        file = os.path.join(folder, import_name.strip().lower() + '.md')
+        try:
+            stat = os.stat(full_file)
+        except OSError:
+            return None
 
-        if not os.path.exists(file):
-            raise TemplateNotFoundException(file)
+        return stat.st_mtime_ns, stat.st_size
 
-        with open(file, 'r', encoding='utf-8') as fin:
-            return fin.read()
+    @staticmethod
+    def get_modified(full_file: str) -> Optional[datetime]:
+        stamp = FileStore.get_stamp(full_file)
+        if stamp is None:
+            return None
 
-    def is_initialized(self) -> bool:
-        return bool(FileStore.__template_folder)
+        return datetime.fromtimestamp(stamp[0] / 1e9, tz=timezone.utc)
+
+    @staticmethod
+    def enable_index(refresh_seconds: Optional[float] = None) -> int:
+        """
+        Indexes the template folder once, after which template lookups, not found results, and
+        change stamps are dict lookups. With refresh_seconds the index is rebuilt when it is older
+        than that, otherwise call refresh_index() after templates change. Returns the file count.
+        """
+        if refresh_seconds is not None and refresh_seconds <= 0:
+            raise ArgumentExpectedException('refresh_seconds')
+
+        FileStore.__index_refresh_seconds = refresh_seconds
+        FileStore.__index_enabled = True
+
+        return FileStore.refresh_index()
+
+    @staticmethod
+    def disable_index():
+        FileStore.__index_enabled = False
+        FileStore.__index = {}
+
+    @staticmethod
+    def is_index_enabled() -> bool:
+        return FileStore.__index_enabled
+
+    @staticmethod
+    def refresh_index() -> int:
+        """
+        Rebuilds the index from the template folder, returns the number of files in it.
+        """
+        index = {}
+        if FileStore.__template_folder:
+            for folder, _, files in os.walk(os.path.abspath(FileStore.__template_folder)):
+                for f in files:
+                    full_file = os.path.join(folder, f)
+                    try:
+                        stat = os.stat(full_file)
+                    except OSError:
+                        continue
+                    index[full_file.lower()] = (full_file, stat.st_mtime_ns, stat.st_size)
+
+        with FileStore.__index_lock:
+            FileStore.__index = index
+            FileStore.__index_built = time.monotonic()
+
+        return len(index)
+
+    @staticmethod
+    def __get_indexed(full_file: str) -> Optional[Tuple[str, int, int]]:
+        refresh_seconds = FileStore.__index_refresh_seconds
+        if refresh_seconds is not None and time.monotonic() - FileStore.__index_built >= refresh_seconds:
+            with FileStore.__index_lock:
+                is_due = time.monotonic() - FileStore.__index_built >= refresh_seconds
+                if is_due:
+                    # Other threads keep using the old index until the new one is ready.
+                    FileStore.__index_built = time.monotonic()
+            if is_due:
+                FileStore.refresh_index()
+
+        return FileStore.__index.get(full_file.lower())
 
     @staticmethod
     def get_folder(path_parts: List[str]) -> str:
@@ -54,6 +196,10 @@ class FileStore(SubtemplateStorage):
 
         return folder
 
+    @staticmethod
+    def get_template_folder() -> Optional[str]:
+        return FileStore.__template_folder
+
     @staticmethod
     def set_template_folder(full_path: str):
         from ..exceptions import PathException
@@ -79,6 +225,9 @@ class FileStore(SubtemplateStorage):
         log.info(f"Template folder set: {full_path}")
 
         FileStore.__template_folder = full_path
+        if FileStore.__index_enabled:
+            FileStore.refresh_index()
 
     def clear_settings(self):
         FileStore.__template_folder = None
+        FileStore.disable_index()
@@ -1,4 +1,6 @@
 import abc
+from datetime import datetime
+from typing import Any, Optional
 
 
 class SubtemplateStorage(abc.ABC):
@@ -17,3 +19,29 @@ class SubtemplateStorage(abc.ABC):
     @abc.abstractmethod
     def clear_settings(self):
         pass
+
+    def get_markdown_stamp(self, template_path) -> Optional[Any]:
+        """
+        A cheap value that changes when the template changes, e.g. its modification time and size.
+        Used to detect stale cache entries when auto reload is enabled. None means not tracked.
+        """
+        return None
+
+    def get_shared_stamp(self, import_name) -> Optional[Any]:
+        """
+        Like get_markdown_stamp(), but for a shared import.
+        """
+        return None
+
+    def get_markdown_modified(self, template_path) -> Optional[datetime]:
+        """
+        When the template last changed, as a timezone aware datetime. Used for the
+        last modified time of pages, None means unknown.
+        """
+        return None
+
+    def get_shared_modified(self, import_name) -> Optional[datetime]:
+        """
+        Like get_markdown_modified(), but for a shared import.
+        """
+        return None
@@ -52,13 +52,13 @@ setup(
     packages=find_packages(exclude=('tests',)),
 
     install_requires=requires,
+    python_requires='>=3.7',
 
     classifiers=[
         'Development Status :: 3 - Alpha',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
     ],
@@ -4,3 +4,21 @@ from engine_tests import *
 from page_tests import *
 # noinspection PyUnresolvedReferences
 from logging_tests import *
+# noinspection PyUnresolvedReferences
+from caching_tests import *
+# noinspection PyUnresolvedReferences
+from change_tracking_tests import *
+# noinspection PyUnresolvedReferences
+from async_tests import *
+# noinspection PyUnresolvedReferences
+from warm_up_tests import *
+# noinspection PyUnresolvedReferences
+from rendering_tests import *
+# noinspection PyUnresolvedReferences
+from bench_tests import *
+# noinspection PyUnresolvedReferences
+from metrics_tests import *
+# noinspection PyUnresolvedReferences
+from storage_tests import *
+# noinspection PyUnresolvedReferences
+from bundle_tests import *
@@ -0,0 +1,101 @@
+import asyncio
+import os
+
+import pytest
+
+from markdown_subtemplate import engine, storage
+from markdown_subtemplate import exceptions
+from markdown_subtemplate.storage import AsyncSubtemplateStorage
+from markdown_subtemplate.storage.file_storage import FileStore
+
+FileStore.set_template_folder(
+    os.path.join(os.path.dirname(__file__), 'templates'))
+
+
+class CountingAsyncStore(AsyncSubtemplateStorage):
+    def __init__(self):
+        self.store = FileStore()
+        self.shared_reads = []
+
+    async def get_markdown_text(self, template_path) -> str:
+        await asyncio.sleep(0)
+        return self.store.get_markdown_text(template_path)
+
+    async def get_shared_markdown(self, import_name) -> str:
+        self.shared_reads.append(import_name)
+        await asyncio.sleep(0)
+        return self.store.get_shared_markdown(import_name)
+
+    def is_initialized(self) -> bool:
+        return True
+
+    def clear_settings(self):
+        pass
+
+
+@pytest.fixture
+def async_store():
+    engine.clear_cache()
+    store = CountingAsyncStore()
+    storage.set_async_storage(store)
+
+    yield store
+
+    storage.clear_async_storage()
+    engine.clear_cache()
+
+
+def test_async_page_matches_sync_page():
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!', 'link': 'https://training.talkpython.fm'}
+
+    engine.clear_cache()
+    html = asyncio.run(engine.get_page_async(template, data))
+    engine.clear_cache()
+
+    assert html == engine.get_page(template, data)
+
+
+def test_async_nested_imports(async_store):
+    template = os.path.join('home', 'import_nested.md')
+    html = asyncio.run(engine.get_page_async(template))
+
+    assert '<h3>This page imports stuff and is imported.</h3>' in html
+    assert '<h2>This is a basic import.</h2>' in html
+    assert sorted(async_store.shared_reads) == ['BASIC_IMPORT', 'NESTED_IMPORT']
+
+
+def test_async_concurrent_misses_render_once(async_store):
+    template = os.path.join('home', 'import1.md')
+
+    async def render_many():
+        return await asyncio.gather(*(engine.get_page_async(template) for _ in range(5)))
+
+    pages = asyncio.run(render_many())
+
+    assert len(set(pages)) == 1
+    assert async_store.shared_reads == ['BASIC_IMPORT']
+
+
+def test_async_missing_template():
+    with pytest.raises(exceptions.TemplateNotFoundException):
+        asyncio.run(engine.get_page_async(os.path.join('home', 'hiding.md')))
+
+
+def test_async_render_uses_task_namespace(async_store):
+    from markdown_subtemplate import caching
+
+    async def render(namespace):
+        with caching.use_namespace(namespace):
+            return await engine.get_page_async(os.path.join('home', 'basic_markdown.md'))
+
+    async def both():
+        return await asyncio.gather(render('async-a'), render('async-b'))
+
+    first, second = asyncio.run(both())
+
+    assert first == second
+    # The page's markdown, HTML, and transformed HTML all land in the task's namespace.
+    assert caching.get_cache('async-a').count() == 3
+    assert caching.get_cache('async-b').count() == 3
+    assert caching.get_cache().count() == 0
@@ -0,0 +1,40 @@
+from markdown_subtemplate import caching
+from markdown_subtemplate.bench import suite
+from markdown_subtemplate.storage.file_storage import FileStore
+
+
+def test_run_suite_restores_settings():
+    folder = FileStore.get_template_folder()
+    cache = caching.get_cache()
+
+    results = suite.run_suite(number=2, repeat=1, only=['html_cache_hit', 'deep_imports_20'])
+
+    assert set(results['results']) == {'html_cache_hit', 'deep_imports_20'}
+    assert results['results']['html_cache_hit']['seconds_per_op'] > 0
+    assert FileStore.get_template_folder() == folder
+    assert caching.get_cache() is cache
+
+
+def test_compare_finds_regressions():
+    baseline = {'results': {'fast': {'seconds_per_op': 1.0}, 'slow': {'seconds_per_op': 1.0}}}
+    current = {'results': {'fast': {'seconds_per_op': 1.1}, 'slow': {'seconds_per_op': 2.0},
+                           'new': {'seconds_per_op': 5.0}}}
+
+    regressions = suite.compare(baseline, current, tolerance=0.25)
+
+    assert [r.name for r in regressions] == ['slow']
+    assert regressions[0].change == 1.0
+
+
+def test_main_compares_before_saving_baseline(tmp_path):
+    import json
+    from markdown_subtemplate.bench.__main__ import main
+
+    baseline_file = tmp_path / 'baseline.json'
+    baseline_file.write_text(json.dumps({'results': {'html_cache_hit': {'seconds_per_op': 1e-12}}}))
+
+    status = main(['--number', '2', '--repeat', '1', '--only', 'html_cache_hit',
+                   '--baseline', str(baseline_file), '--save-baseline', str(baseline_file)])
+
+    assert status == 1
+    assert json.loads(baseline_file.read_text())['results']['html_cache_hit']['seconds_per_op'] > 1e-12
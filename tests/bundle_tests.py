@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+from markdown_subtemplate import caching, engine, exceptions, storage
+from markdown_subtemplate.bundle import BundleFile, write_bundle, builder
+from markdown_subtemplate.bundle import __main__ as bundle_main
+from markdown_subtemplate.caching import BundleCache
+from markdown_subtemplate.storage import BundleStorage
+from markdown_subtemplate.storage.file_storage import FileStore
+
+template_folder = os.path.join(os.path.dirname(__file__), 'templates')
+FileStore.set_template_folder(template_folder)
+
+
+@pytest.fixture
+def bundle_file(tmp_path):
+    file = os.path.join(str(tmp_path), 'templates.bundle')
+    result = builder.build_bundle(template_folder, file, include_html=True)
+
+    assert result.shared == 6
+    assert sorted(result.errors) == [os.path.join('home', 'import_cycle.md'), os.path.join('home', 'import_missing.md')]
+    assert result.html_pages == result.pages - 2
+
+    original_storage = storage.get_storage()
+    original_cache = caching.get_cache()
+    engine.clear_cache()
+
+    yield file
+
+    storage.set_storage(original_storage)
+    caching.set_cache(original_cache)
+    engine.clear_cache()
+    assert FileStore.get_template_folder() == template_folder
+
+
+def test_bundle_file_round_trip(tmp_path):
+    file = os.path.join(str(tmp_path), 'test.bundle')
+    write_bundle(file, {'page': {'home/a.md': '# Å', 'home/b.md': ''}}, version='v1',
+                 modified={'page': {'home/a.md': 1000.0}})
+
+    bundle = BundleFile(file)
+    assert bundle.version == 'v1'
+    assert bundle.get('page', 'home/a.md') == '# Å'
+    assert bundle.get('page', 'home/b.md') == ''
+    assert bundle.get('page', 'home/c.md') is None
+    assert bundle.get_modified('page', 'home/a.md').timestamp() == 1000.0
+    assert bundle.keys('page') == ['home/a.md', 'home/b.md']
+    bundle.close()
+
+
+def test_bundle_file_rejects_other_files(tmp_path):
+    file = os.path.join(str(tmp_path), 'not.bundle')
+    with open(file, 'wb') as fout:
+        fout.write(b'Not a bundle, but long enough for a header.')
+
+    with pytest.raises(exceptions.InvalidOperationException):
+        BundleFile(file)
+
+
+def test_bundle_storage_matches_file_store(bundle_file):
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'title': 'The title', 'link': 'https://example.com'}
+    expected = engine.get_page(template, data)
+
+    storage.set_storage(BundleStorage(bundle_file))
+    engine.clear_cache()
+
+    assert engine.get_page(template, data) == expected
+    assert engine.get_page_with_meta(template, data).last_modified is not None
+    with pytest.raises(exceptions.TemplateNotFoundException):
+        engine.get_page(os.path.join('home', 'missing.md'))
+
+
+def test_bundle_cache_serves_rendered_pages(bundle_file):
+    template = os.path.join('home', 'variables.md')
+    expected = engine.get_page(template, {})
+    engine.clear_cache()
+
+    caching.set_cache(BundleCache(bundle_file))
+    engine.reset_stats()
+
+    assert engine.get_page(template, {}) == expected
+    assert engine.get_stats()['counters'].get('storage.reads') is None
+
+
+def test_bundle_cache_remove_and_clear(bundle_file):
+    cache = BundleCache(bundle_file)
+    key = f"html: {os.path.join('home', 'variables.md')}"
+    bundled = cache.count()
+
+    assert cache.get_html(key)
+    assert cache.remove_html(key)
+    assert cache.get_html(key) is None
+    assert cache.count() == bundled - 1
+
+    cache.add_html(key, key, '<p>New</p>')
+    assert cache.get_html(key).contents == '<p>New</p>'
+    assert cache.count() == bundled
+
+    cache.clear()
+    assert cache.count() == 0
+    assert cache.get_html(f"html: {os.path.join('home', 'basic_markdown.md')}") is None
+
+
+def test_bundle_cache_ignores_other_versions(bundle_file):
+    cache = BundleCache(bundle_file, version='some other version')
+
+    assert cache.count() == 0
+    assert cache.get_html(f"html: {os.path.join('home', 'variables.md')}") is None
+
+
+def test_bundle_command_line(tmp_path, capsys):
+    file = os.path.join(str(tmp_path), 'cli.bundle')
+
+    assert bundle_main.main([template_folder, file]) == 0
+    assert 'rendered pages' in capsys.readouterr().out
+    assert bundle_main.main([template_folder, file, '--html']) == 1
+    assert BundleFile(file).keys('shared')
+
+
+def test_bundle_cache_remove_by_prefix(bundle_file):
+    cache = BundleCache(bundle_file)
+    cache.add_html('html: added.md', 'added', '<p>Added</p>')
+
+    assert cache.remove_html_prefix(f"html: {os.path.join('home', 'import')}") == 2
+    assert cache.remove_html_prefix('html: added') == 1
+    assert cache.get_html(f"html: {os.path.join('home', 'import1.md')}") is None
+    assert cache.get_html(f"html: {os.path.join('home', 'variables.md')}") is not None
@@ -0,0 +1,452 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from markdown_subtemplate import caching, engine
+from markdown_subtemplate import exceptions
+from markdown_subtemplate.caching import BoundedMemoryCache, SqliteCache, SharedMemoryCache, TieredCache
+from markdown_subtemplate.caching.single_flight import SingleFlight
+from markdown_subtemplate.storage.file_storage import FileStore
+
+FileStore.set_template_folder(
+    os.path.join(os.path.dirname(__file__), 'templates'))
+
+
+def test_bounded_cache_evicts_least_recently_used():
+    cache = BoundedMemoryCache(max_entries=2)
+    cache.add_html('a', 'a', 'A')
+    cache.add_html('b', 'b', 'B')
+
+    assert cache.get_html('a').contents == 'A'
+    cache.add_markdown('c', 'c', 'C')
+
+    assert cache.count() == 2
+    assert cache.get_html('b') is None
+    assert cache.get_html('a').contents == 'A'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_bounded_cache_byte_budget():
+    text = 'x' * 1000
+    cache = BoundedMemoryCache(max_entries=None, max_bytes=2500)
+    for n in range(5):
+        cache.add_html(str(n), str(n), text)
+
+    stats = cache.stats()
+    assert stats['bytes'] <= 2500
+    assert stats['count'] == 2
+    assert stats['evictions'] == 3
+
+
+def test_bounded_cache_ttl():
+    cache = BoundedMemoryCache(ttl_seconds=0.01)
+    cache.add_markdown('a', 'a', 'A')
+    assert cache.get_markdown('a').contents == 'A'
+
+    time.sleep(0.02)
+
+    assert cache.get_markdown('a') is None
+    assert cache.count() == 0
+    assert cache.stats()['expirations'] == 1
+
+
+def test_bounded_cache_replaces_existing_key():
+    cache = BoundedMemoryCache(max_entries=5)
+    cache.add_html('a', 'a', 'A')
+    cache.add_html('a', 'a', 'AA')
+
+    assert cache.count() == 1
+    assert cache.get_html('a').contents == 'AA'
+
+
+def test_bounded_cache_invalid_limits():
+    with pytest.raises(exceptions.ArgumentExpectedException):
+        BoundedMemoryCache(max_entries=0)
+
+
+def test_default_cache_stats():
+    cache = caching.get_cache()
+    assert cache.stats()['count'] == cache.count()
+
+
+def test_get_or_add_html_renders_once_under_contention():
+    cache = BoundedMemoryCache()
+    calls = []
+    start = threading.Event()
+
+    def create_html():
+        calls.append(1)
+        time.sleep(0.05)
+        return '<p>html</p>'
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_add_html('page', 'page', create_html).contents)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    start.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ['<p>html</p>'] * 8
+
+
+def test_cold_render_looks_up_html_once_before_rendering():
+    original = caching.get_cache()
+    cache = BoundedMemoryCache()
+    caching.set_cache(cache)
+    try:
+        engine.get_page(os.path.join('home', 'basic_markdown.md'))
+    finally:
+        caching.set_cache(original)
+
+    # HTML, markdown and converted markdown, plus the HTML re-check by the single-flight leader.
+    assert cache.stats()['misses'] == 4
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+
+    def fail():
+        raise exceptions.TemplateNotFoundException('missing.md')
+
+    with pytest.raises(exceptions.TemplateNotFoundException):
+        flight.run('key', fail)
+
+    assert flight.in_flight() == 0
+    assert flight.run('key', lambda: 7) == 7
+
+
+def test_sqlite_cache_persists(tmp_path):
+    db_file = str(tmp_path / 'cache.db')
+    cache = SqliteCache(db_file)
+    cache.add_html('html: page.md', 'html: page.md', '<p>page</p>')
+    cache.add_markdown('markdown: page.md', 'markdown: page.md', 'page')
+
+    reopened = SqliteCache(db_file)
+
+    assert reopened.get_html('html: page.md').contents == '<p>page</p>'
+    assert reopened.get_markdown('markdown: page.md').contents == 'page'
+    assert reopened.get_html('markdown: page.md') is None
+    assert reopened.count() == 2
+
+
+def test_sqlite_cache_ignores_other_versions(tmp_path):
+    db_file = str(tmp_path / 'cache.db')
+    SqliteCache(db_file, version='old').add_html('k', 'k', 'old html')
+
+    cache = SqliteCache(db_file)
+
+    assert cache.get_html('k') is None
+    assert cache.count() == 0
+    assert cache.stats() == {'count': 0, 'other_versions': 1}
+    assert cache.remove_other_versions() == 1
+
+
+def test_sqlite_cache_replace_remove_clear(tmp_path):
+    cache = SqliteCache(str(tmp_path / 'cache.db'))
+    cache.add_html('k', 'k', 'one')
+    cache.add_html('k', 'k', 'two')
+
+    assert cache.get_html('k').contents == 'two'
+    assert cache.remove_html('k')
+    assert not cache.remove_html('k')
+
+    cache.add_markdown('m', 'm', 'md')
+    cache.clear()
+    assert cache.count() == 0
+
+
+def test_sqlite_cache_serves_pages(tmp_path):
+    template = os.path.join('home', 'variables.md')
+    original = caching.get_cache()
+    try:
+        caching.set_cache(SqliteCache(str(tmp_path / 'cache.db')))
+        engine.clear_cache()
+        html = engine.get_page(template, {})
+
+        caching.set_cache(SqliteCache(str(tmp_path / 'cache.db')))
+        assert caching.get_cache().get_html(f'html: {template}').contents == html
+        assert engine.get_page(template, {}) == html
+    finally:
+        caching.set_cache(original)
+        engine.clear_cache()
+
+
+def test_shared_memory_cache_round_trip(tmp_path):
+    cache = SharedMemoryCache(str(tmp_path / 'cache.mmap'), size_bytes=256 * 1024, slot_count=64)
+    cache.add_html('html: page.md', 'html: page.md', '<p>pagé</p>')
+    cache.add_markdown('html: page.md', 'markdown', 'markdown text')
+    cache.add_html('html: page.md', 'html: page.md', '<p>page v2</p>')
+
+    assert cache.get_html('html: page.md').contents == '<p>page v2</p>'
+    assert cache.get_markdown('html: page.md').contents == 'markdown text'
+    assert cache.get_html('missing') is None
+    assert cache.count() == 2
+
+    assert cache.remove_html('html: page.md')
+    assert cache.get_html('html: page.md') is None
+    assert cache.get_markdown('html: page.md') is not None
+    assert cache.count() == 1
+
+    cache.clear()
+    assert cache.count() == 0
+
+
+def test_shared_memory_cache_visible_across_processes(tmp_path):
+    file_path = str(tmp_path / 'cache.mmap')
+    cache = SharedMemoryCache(file_path, size_bytes=256 * 1024, slot_count=64)
+
+    context = multiprocessing.get_context('spawn')
+    process = context.Process(target=add_shared_entry, args=(file_path,))
+    process.start()
+    process.join(30)
+
+    assert process.exitcode == 0
+    assert cache.get_html('html: other.md').contents == '<p>from another process</p>'
+
+
+def add_shared_entry(file_path):
+    SharedMemoryCache(file_path, size_bytes=256 * 1024, slot_count=64) \
+        .add_html('html: other.md', 'html: other.md', '<p>from another process</p>')
+
+
+def test_shared_memory_cache_starts_over_when_full(tmp_path):
+    cache = SharedMemoryCache(str(tmp_path / 'cache.mmap'), size_bytes=256 * 1024, slot_count=8)
+    for n in range(10):
+        cache.add_html(str(n), str(n), 'x' * 100)
+
+    assert cache.stats()['resets'] == 1
+    assert cache.get_html('9') is not None
+    assert cache.get_html('0') is None
+
+
+def test_shared_memory_cache_keeps_the_size_of_an_existing_file(tmp_path):
+    file_path = str(tmp_path / 'cache.mmap')
+    first = SharedMemoryCache(file_path, size_bytes=4 * 1024 * 1024, slot_count=64)
+    second = SharedMemoryCache(file_path, size_bytes=1024 * 1024, slot_count=32)
+
+    assert os.path.getsize(file_path) == 4 * 1024 * 1024
+    assert second.stats()['capacity_bytes'] == first.stats()['capacity_bytes']
+    assert second.stats()['slots'] == 64
+
+    # Written past the 1 MB the second cache asked for.
+    html = '<p>page</p>' * 200_000
+    first.add_html('html: page.md', 'html: page.md', html)
+    assert second.get_html('html: page.md').contents == html
+
+
+def test_shared_memory_cache_versions_do_not_mix(tmp_path):
+    file_path = str(tmp_path / 'cache.mmap')
+    v1 = SharedMemoryCache(file_path, size_bytes=256 * 1024, slot_count=64, version='v1')
+    v2 = SharedMemoryCache(file_path, size_bytes=256 * 1024, slot_count=64, version='v2')
+
+    v1.add_html('html: page.md', 'html: page.md', '<p>v1</p>')
+    assert v2.get_html('html: page.md') is None
+
+    v2.add_html('html: page.md', 'html: page.md', '<p>v2</p>')
+    assert v1.get_html('html: page.md').contents == '<p>v1</p>'
+    assert v2.get_html('html: page.md').contents == '<p>v2</p>'
+    assert v1.count() == 2
+
+    assert v1.remove_html('html: page.md')
+    assert v2.get_html('html: page.md') is None
+    assert v1.count() == 0
+
+
+def test_shared_memory_cache_rejects_other_files(tmp_path):
+    file_path = tmp_path / 'notes.txt'
+    file_path.write_text('not a cache')
+
+    with pytest.raises(exceptions.InvalidOperationException):
+        SharedMemoryCache(str(file_path))
+    assert file_path.read_text() == 'not a cache'
+
+
+def test_memory_caches_are_independent():
+    first = caching.MemoryCache()
+    second = caching.MemoryCache()
+    first.add_html('a', 'a', 'A')
+
+    assert second.get_html('a') is None
+    assert second.count() == 0
+
+
+@pytest.fixture
+def namespaces():
+    engine.clear_cache()
+    caching.set_cache(BoundedMemoryCache(max_entries=100), namespace='tenant-a')
+
+    yield
+
+    engine.clear_cache()
+
+
+def test_namespaces_have_their_own_cache(namespaces):
+    template = os.path.join('home', 'basic_markdown.md')
+
+    with caching.use_namespace('tenant-a') as cache:
+        html = engine.get_page(template)
+        assert isinstance(cache, BoundedMemoryCache)
+        assert caching.get_namespace() == 'tenant-a'
+    with caching.use_namespace('tenant-b'):
+        assert engine.get_page(template) == html
+
+    assert caching.get_namespace() is None
+    assert caching.get_cache().count() == 0
+    assert caching.get_cache('tenant-a').count() > 0
+    assert isinstance(caching.get_cache('tenant-b'), caching.MemoryCache)
+    assert {'tenant-a', 'tenant-b'} <= set(caching.get_namespaces())
+
+
+def test_clear_cache_for_one_namespace(namespaces):
+    template = os.path.join('home', 'basic_markdown.md')
+    for namespace in ('tenant-a', 'tenant-b'):
+        with caching.use_namespace(namespace):
+            engine.get_page(template)
+
+    engine.clear_cache(namespace='tenant-a')
+
+    assert caching.get_cache('tenant-a').count() == 0
+    assert caching.get_cache('tenant-b').count() > 0
+
+
+def test_invalidate_reaches_every_namespace(namespaces):
+    from markdown_subtemplate.infrastructure import page
+
+    template = os.path.join('home', 'basic_markdown.md')
+    for namespace in ('tenant-a', 'tenant-b'):
+        with caching.use_namespace(namespace):
+            engine.get_page(template)
+
+    page.invalidate_page(template)
+
+    for namespace in ('tenant-a', 'tenant-b'):
+        assert caching.get_cache(namespace).get_html(f'html: {template}') is None
+
+
+def test_namespace_required():
+    with pytest.raises(exceptions.ArgumentExpectedException):
+        caching.get_cache('  ')
+
+
+@pytest.mark.parametrize('cache_type', ['memory', 'bounded', 'sqlite', 'shared', 'tiered'])
+def test_remove_by_prefix(cache_type, tmp_path):
+    cache = {
+        'memory': lambda: caching.MemoryCache(),
+        'bounded': lambda: BoundedMemoryCache(),
+        'sqlite': lambda: SqliteCache(os.path.join(str(tmp_path), 'cache.db')),
+        'shared': lambda: SharedMemoryCache(os.path.join(str(tmp_path), 'cache.shm'), size_bytes=1024 * 1024),
+        'tiered': lambda: TieredCache(SqliteCache(os.path.join(str(tmp_path), 'cache.db'))),
+    }[cache_type]()
+
+    for key in ('html: docs/a.md', 'html: docs/b.md', 'html: home/docs_%.md'):
+        cache.add_html(key, key, 'HTML')
+        cache.add_markdown(key.replace('html', 'markdown'), key, 'MD')
+
+    assert cache.remove_html_prefix('html: docs/') == 2
+    assert cache.remove_markdown_prefix('markdown: docs/') == 2
+    assert cache.remove_html_prefix('html: docs_') == 0
+    assert cache.get_html('html: docs/a.md') is None
+    assert cache.get_html('html: home/docs_%.md').contents == 'HTML'
+    assert cache.count() == 2
+
+
+def test_tiered_cache_fills_l1_from_l2(tmp_path):
+    db_file = os.path.join(str(tmp_path), 'cache.db')
+    SqliteCache(db_file).add_html('html: a.md', 'a', 'Shared A')
+
+    cache = TieredCache(SqliteCache(db_file))
+
+    assert cache.get_html('html: a.md').contents == 'Shared A'
+    assert cache.l1.get_html('html: a.md').contents == 'Shared A'
+    assert cache.get_html('html: a.md').contents == 'Shared A'
+    assert cache.get_markdown('markdown: a.md') is None
+
+    stats = cache.stats()
+    assert (stats['l1_hits'], stats['l2_hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_tiered_cache_writes_through(tmp_path):
+    db_file = os.path.join(str(tmp_path), 'cache.db')
+    cache = TieredCache(SqliteCache(db_file), l1=BoundedMemoryCache(max_entries=1))
+
+    cache.add_html('html: a.md', 'a', 'A')
+    cache.add_markdown('markdown: a.md', 'a', 'MD')
+
+    other_process = SqliteCache(db_file)
+    assert other_process.get_html('html: a.md').contents == 'A'
+    assert cache.count() == 2
+    assert cache.l1.count() == 1
+
+    assert cache.remove_html('html: a.md')
+    assert cache.get_html('html: a.md') is None
+    assert other_process.get_html('html: a.md') is None
+
+    cache.clear()
+    assert other_process.count() == 0
+
+
+def test_tiered_cache_serves_pages(tmp_path):
+    db_file = os.path.join(str(tmp_path), 'cache.db')
+    template = os.path.join('home', 'basic_markdown.md')
+    original = caching.get_cache()
+    try:
+        engine.clear_cache()
+        caching.set_cache(TieredCache(SqliteCache(db_file)))
+        html = engine.get_page(template)
+
+        # A second worker starts with an empty L1 and finds the page in the shared L2.
+        worker = TieredCache(SqliteCache(db_file))
+        caching.set_cache(worker)
+
+        assert engine.get_page(template) == html
+        assert worker.stats()['l2_hits'] == 1
+    finally:
+        caching.set_cache(original)
+
+
+def test_tiered_cache_requires_l2():
+    with pytest.raises(exceptions.ArgumentExpectedException):
+        # noinspection PyTypeChecker
+        TieredCache(None)
+
+
+def test_shared_memory_cache_requires_a_file_lock(tmp_path, monkeypatch):
+    from markdown_subtemplate.caching import shared_memory_cache
+    monkeypatch.setattr(shared_memory_cache, 'fcntl', None)
+    monkeypatch.setattr(shared_memory_cache, 'msvcrt', None)
+
+    with pytest.raises(exceptions.InvalidOperationException):
+        SharedMemoryCache(str(tmp_path / 'shared.cache'))
+
+
+def test_default_version_is_shared(tmp_path):
+    assert SqliteCache(str(tmp_path / 'cache.db')).version == caching.get_default_version()
+
+
+def test_default_version_includes_renderer(tmp_path):
+    from markdown_subtemplate import rendering
+
+    class OtherRenderer(rendering.Markdown2Renderer):
+        name = 'other'
+
+    default_version = caching.get_default_version()
+    rendering.set_renderer(OtherRenderer())
+    try:
+        other_version = caching.get_default_version()
+        cache = SqliteCache(str(tmp_path / 'cache.db'))
+    finally:
+        rendering.set_renderer(rendering.Markdown2Renderer())
+
+    assert 'renderer markdown2' in default_version
+    assert 'renderer other' in other_version
+    assert cache.version == other_version != default_version
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from markdown_subtemplate import engine
+from markdown_subtemplate.storage.file_storage import FileStore
+
+
+@pytest.fixture
+def tracked_folder(tmp_path):
+    os.makedirs(os.path.join(str(tmp_path), '_shared'))
+    os.makedirs(os.path.join(str(tmp_path), 'home'))
+
+    original_folder = FileStore.get_template_folder()
+    FileStore.set_template_folder(str(tmp_path))
+    engine.clear_cache()
+    engine.set_auto_reload(True, check_interval_seconds=0)
+
+    yield str(tmp_path)
+
+    engine.set_auto_reload(False)
+    engine.clear_cache()
+    if original_folder:
+        FileStore.set_template_folder(original_folder)
+    else:
+        FileStore().clear_settings()
+
+
+def write(folder, path, text):
+    file = os.path.join(folder, path)
+    with open(file, 'w', encoding='utf-8') as fout:
+        fout.write(text)
+
+    # Make sure the stamp changes even on file systems with coarse timestamps.
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_edited_page_is_reloaded(tracked_folder):
+    page = os.path.join('home', 'index.md')
+    write(tracked_folder, page, '# Version one')
+    assert '<h1>Version one</h1>' in engine.get_page(page)
+
+    write(tracked_folder, page, '# Version two')
+    assert '<h1>Version two</h1>' in engine.get_page(page)
+
+
+def test_edited_import_is_reloaded(tracked_folder):
+    page = os.path.join('home', 'index.md')
+    write(tracked_folder, page, '# Title\n\n[IMPORT FOOTER]')
+    write(tracked_folder, os.path.join('_shared', 'footer.md'), 'Old footer')
+    assert '<p>Old footer</p>' in engine.get_page(page)
+
+    write(tracked_folder, os.path.join('_shared', 'footer.md'), 'New footer')
+    assert '<p>New footer</p>' in engine.get_page(page)
+
+
+def test_checks_are_rate_limited(tracked_folder):
+    engine.set_auto_reload(True, check_interval_seconds=60)
+
+    page = os.path.join('home', 'index.md')
+    write(tracked_folder, page, '# Version one')
+    engine.get_page(page)
+
+    write(tracked_folder, page, '# Version two')
+    assert '<h1>Version one</h1>' in engine.get_page(page)
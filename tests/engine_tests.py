@@ -26,3 +26,109 @@ def test_init_folder_success():
 
 def test_clear_cache():
     caching.get_cache().clear()
+
+
+def test_import_graph():
+    engine.clear_cache()
+    engine.get_page(os.path.join('home', 'import1.md'))
+    engine.get_page(os.path.join('home', 'import_nested.md'))
+    engine.get_page(os.path.join('home', 'basic_markdown.md'))
+
+    graph = engine.get_import_graph()
+
+    assert graph['basic_import'] == [os.path.join('home', 'import1.md'), os.path.join('home', 'import_nested.md')]
+    assert graph['nested_import'] == [os.path.join('home', 'import_nested.md')]
+    assert engine.get_pages_using_import('BASIC_IMPORT') == graph['basic_import']
+
+
+def test_invalidate_import_evicts_dependent_pages_only():
+    engine.clear_cache()
+    cache = caching.get_cache()
+    with_import = os.path.join('home', 'import1.md')
+    without_import = os.path.join('home', 'basic_markdown.md')
+    engine.get_page(with_import)
+    engine.get_page(without_import)
+
+    count = engine.invalidate_import('basic_import')
+
+    assert count == 1
+    assert cache.get_html(f'html: {with_import}') is None
+    assert cache.get_markdown(f'markdown: {with_import}') is None
+    assert cache.get_html(f'html: {without_import}') is not None
+    assert '<h2>This is a basic import.</h2>' in engine.get_page(with_import)
+
+
+def test_invalidate_single_page():
+    engine.clear_cache()
+    cache = caching.get_cache()
+    page = os.path.join('home', 'import1.md')
+    other = os.path.join('home', 'basic_markdown.md')
+    engine.get_page(page)
+    engine.get_page(other)
+
+    engine.invalidate(page.upper())
+
+    assert cache.get_html(f'html: {page}') is None
+    assert cache.get_markdown(f'markdown: {page}') is None
+    assert cache.get_html(f'html: {other}') is not None
+
+    with pytest.raises(exceptions.ArgumentExpectedException):
+        engine.invalidate(' ')
+
+
+def test_invalidate_prefix():
+    engine.clear_cache()
+    cache = caching.get_cache()
+    pages = [os.path.join('home', 'import1.md'), os.path.join('home', 'basic_markdown.md')]
+    for page in pages:
+        engine.get_page(page)
+    transformed = cache.count()
+
+    count = engine.invalidate_prefix(os.path.join('home', 'import'))
+
+    assert count == 1
+    assert cache.get_html(f'html: {pages[0]}') is None
+    assert cache.get_html(f'html: {pages[1]}') is not None
+    assert cache.count() == transformed - 2
+
+
+class NoPrefixCache(caching.MemoryCache):
+    def remove_html_prefix(self, prefix: str) -> int:
+        raise NotImplementedError()
+
+
+def test_invalidate_prefix_without_cache_support():
+    original = caching.get_cache()
+    caching.set_cache(NoPrefixCache())
+    try:
+        engine.clear_cache()
+        page = os.path.join('home', 'import1.md')
+        engine.get_page(page)
+
+        assert engine.invalidate_prefix('home') == 1
+        assert caching.get_cache().get_html(f'html: {page}') is None
+    finally:
+        caching.set_cache(original)
+
+
+class NoMarkdownRemovalCache(caching.MemoryCache):
+    def remove_markdown(self, key: str) -> bool:
+        raise NotImplementedError()
+
+    def remove_markdown_prefix(self, prefix: str) -> int:
+        raise NotImplementedError()
+
+
+def test_invalidate_prefix_counts_pages_once():
+    original = caching.get_cache()
+    caching.set_cache(NoMarkdownRemovalCache())
+    try:
+        engine.clear_cache()
+        page = os.path.join('home', 'import1.md')
+        engine.get_page(page)
+
+        assert engine.invalidate_prefix('home') == 1
+        assert caching.get_cache().get_html(f'html: {page}') is None
+        assert caching.get_cache().get_markdown(f'markdown: {page}') is None
+    finally:
+        caching.set_cache(original)
@@ -1,5 +1,12 @@
-from markdown_subtemplate import logging
-from markdown_subtemplate.logging import LogLevel
+import logging as stdlib_logging
+import os
+
+from markdown_subtemplate import engine, logging
+from markdown_subtemplate.logging import LogLevel, NullLogger, StdOutLogger, StdLibLogger
+from markdown_subtemplate.storage.file_storage import FileStore
+
+FileStore.set_template_folder(
+    os.path.join(os.path.dirname(__file__), 'templates'))
 
 
 def test_default_log_level():
@@ -39,3 +46,60 @@ def test_logging_off():
         assert not log.should_log(LogLevel.verbose, 'MSG')
     finally:
         log.log_level = level
+
+
+def test_is_enabled():
+    log = logging.get_log()
+    assert log.is_enabled(LogLevel.info)
+    assert not log.is_enabled(LogLevel.verbose)
+    assert not NullLogger().is_enabled(LogLevel.error)
+
+
+def test_should_log_blank_text():
+    log = logging.get_log()
+    assert not log.should_log(LogLevel.error, '  \n')
+    assert not log.should_log(LogLevel.error, '')
+
+
+class CountingLogger(StdOutLogger):
+    def __init__(self, log_level: int):
+        super().__init__(log_level)
+        self.calls = 0
+
+    def verbose(self, text: str):
+        self.calls += 1
+
+    def trace(self, text: str):
+        self.calls += 1
+
+
+def test_disabled_levels_are_not_called():
+    original = logging.get_log()
+    counting = CountingLogger(LogLevel.info)
+    template = os.path.join('home', 'replacements_import.md')
+    try:
+        logging.set_log(counting)
+        engine.get_page(template, {'title': 'T'})
+        engine.get_page(template, {'title': 'T'})
+        assert counting.calls == 0
+
+        counting.log_level = LogLevel.verbose
+        engine.get_page(template, {'title': 'T'})
+        assert counting.calls > 0
+    finally:
+        logging.set_log(original)
+
+
+def test_stdlib_logger(caplog):
+    log = StdLibLogger()
+    with caplog.at_level(stdlib_logging.INFO, logger='markdown_subtemplate'):
+        log.info('Info message')
+        log.verbose('Verbose message')
+        log.error('Error message')
+        assert log.is_enabled(LogLevel.info)
+        assert not log.is_enabled(LogLevel.verbose)
+
+    assert [(r.levelname, r.message) for r in caplog.records] == [
+        ('INFO', 'Info message'),
+        ('ERROR', 'Error message'),
+    ]
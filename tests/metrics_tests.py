@@ -0,0 +1,117 @@
+import os
+import threading
+
+import pytest
+
+from markdown_subtemplate import engine, metrics
+from markdown_subtemplate import exceptions
+from markdown_subtemplate.metrics import MetricsSink, Histogram
+from markdown_subtemplate.storage.file_storage import FileStore
+
+FileStore.set_template_folder(
+    os.path.join(os.path.dirname(__file__), 'templates'))
+
+
+class RecordingSink(MetricsSink):
+    def __init__(self):
+        self.counters = []
+        self.observations = []
+
+    def increment(self, name: str, value: int):
+        self.counters.append((name, value))
+
+    def observe(self, name: str, seconds: float):
+        self.observations.append(name)
+
+
+@pytest.fixture
+def sink():
+    original = metrics.get_sink()
+    recording = RecordingSink()
+    metrics.set_sink(recording)
+    engine.clear_cache()
+    engine.reset_stats()
+
+    yield recording
+
+    metrics.set_sink(original)
+    engine.reset_stats()
+
+
+def test_stats_count_hits_misses_and_reads(sink):
+    template = os.path.join('home', 'import_nested.md')
+    engine.get_page(template)
+    engine.get_page(template)
+
+    stats = engine.get_stats()
+    counters = stats['counters']
+
+    assert counters[metrics.html_cache_misses] == 1
+    assert counters[metrics.html_cache_hits] == 1
+    assert counters[metrics.markdown_cache_misses] == 1
+    assert counters[metrics.transform_cache_misses] == 1
+    assert counters[metrics.storage_reads] == 3
+    assert counters[metrics.imports_expanded] == 2
+    assert stats['ratios']['html_cache.hit_ratio'] == 0.5
+    assert stats['histograms'][metrics.render_cold]['count'] == 1
+    # The page's HTML and markdown plus the converted markdown.
+    assert stats['cache']['count'] == 3
+
+
+def test_counters_from_all_threads_are_added_up(sink):
+    def count():
+        for _ in range(1000):
+            metrics.increment(metrics.storage_reads)
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    count()
+
+    assert metrics.get_stats()['counters'][metrics.storage_reads] == 5000
+    assert metrics.get_stats()['counters'][metrics.storage_reads] == 5000
+
+    metrics.reset()
+    metrics.increment(metrics.storage_reads)
+    assert metrics.get_stats()['counters'] == {metrics.storage_reads: 1}
+
+
+def test_finished_threads_are_not_kept(sink):
+    for _ in range(200):
+        t = threading.Thread(target=metrics.increment, args=(metrics.storage_reads,))
+        t.start()
+        t.join()
+
+    assert len(metrics.__dict__['__thread_counters']) <= 2
+    assert metrics.get_stats()['counters'][metrics.storage_reads] == 200
+
+
+def test_sink_receives_metrics(sink):
+    engine.get_page(os.path.join('home', 'basic_markdown.md'))
+
+    assert (metrics.html_cache_misses, 1) in sink.counters
+    assert metrics.render_cold in sink.observations
+    assert metrics.transform_render in sink.observations
+
+
+def test_set_sink_requires_sink():
+    with pytest.raises(exceptions.ArgumentExpectedException):
+        # noinspection PyTypeChecker
+        metrics.set_sink(None)
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    histogram.observe(0.0004)
+    histogram.observe(0.003)
+    histogram.observe(60)
+
+    stats = histogram.to_dict()
+
+    assert stats['count'] == 3
+    assert stats['buckets']['<=0.5ms'] == 1
+    assert stats['buckets']['<=5ms'] == 1
+    assert stats['buckets']['+inf'] == 1
+    assert stats['max_ms'] == 60_000
@@ -1,10 +1,11 @@
 import os
+import time
 
 import pytest
 
-from markdown_subtemplate import engine
+from markdown_subtemplate import caching, engine
 from markdown_subtemplate import exceptions
-from markdown_subtemplate.infrastructure import page
+from markdown_subtemplate.infrastructure import page, compiled_template
 from markdown_subtemplate.storage.file_storage import FileStore
 
 FileStore.set_template_folder(
@@ -285,3 +286,278 @@ def test_no_inline_variables():
     page.get_inline_variables(md, vars, None)
 
     assert {} == vars
+
+
+def test_compiled_template_render():
+    compiled = compiled_template.CompiledTemplate('<p>$TITLE$ and $LINK$ and $TITLE$</p>')
+    html = compiled.render({'title': 'T', 'Link': 'L', 'unused': 'U'})
+
+    assert html == '<p>T and L and T</p>'
+    assert len(compiled.slots) == 3
+
+
+def test_compiled_template_leaves_unknown_and_lowercase_placeholders():
+    compiled = compiled_template.CompiledTemplate('Costs $5 and $10, $title$ and $MISSING$.')
+    html = compiled.render({'title': 'T'})
+
+    assert html == 'Costs $5 and $10, $title$ and $MISSING$.'
+
+
+def test_compiled_template_matches_process_variables():
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!', 'link': 'https://training.talkpython.fm'}
+    md = page.get_markdown(template)
+
+    assert compiled_template.CompiledTemplate(md).render(data) == page.process_variables(md, data)
+
+
+def test_compiled_template_stray_dollar_before_placeholder():
+    data = {'name': 'Bob'}
+    for text in ['Only $100 $NAME$ today', 'cost: $5 $NAME$', '<code>$PATH $NAME$</code>',
+                 '$100$NAME$', '$ NAME$ $NAME$$NAME$']:
+        assert compiled_template.CompiledTemplate(text).render(data) == page.process_variables(text, data)
+
+    assert compiled_template.CompiledTemplate('Only $100 $NAME$ today').render(data) == 'Only $100 Bob today'
+
+    cases = [
+        ('Pay $US,$NAME$', {'name': 'Bob'}, 'Pay $US,Bob'),
+        ('Winner: $1ST$', {'1st': 'Gold'}, 'Winner: Gold'),
+        ('Hi $FIRST NAME$!', {'first name': 'Bob'}, 'Hi Bob!'),
+    ]
+    for text, values, expected in cases:
+        compiled = compiled_template.CompiledTemplate(text)
+        assert compiled.render(values) == page.process_variables(text, values) == expected
+        assert compiled.render_bytes(values) == expected.encode('utf-8')
+        assert ''.join(compiled.iter_render(values)) == expected
+
+
+def test_page_stream_matches_page():
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!', 'link': 'https://training.talkpython.fm'}
+
+    chunks = list(engine.get_page_stream(template, data))
+
+    assert len(chunks) > 1
+    assert ''.join(chunks) == engine.get_page(template, data)
+
+
+def test_page_stream_bytes_matches_page():
+    template = os.path.join('home', 'variables.md')
+
+    chunks = list(engine.get_page_stream_bytes(template, {}))
+
+    assert all(isinstance(c, bytes) for c in chunks)
+    assert b''.join(chunks) == engine.get_page(template, {}).encode('utf-8')
+
+
+def test_page_stream_missing_template_raises_on_call():
+    with pytest.raises(exceptions.TemplateNotFoundException):
+        engine.get_page_stream(os.path.join('home', 'hiding.md'), {})
+
+
+def test_import_cycle_raises():
+    template = os.path.join('home', 'import_cycle.md')
+    with pytest.raises(exceptions.ImportCycleException) as x:
+        page.get_markdown(template)
+
+    assert x.value.import_chain == ['cycle_a', 'cycle_b', 'cycle_a']
+
+
+def test_import_max_depth():
+    template = os.path.join('home', 'import_nested.md')
+    depth = page.get_max_import_depth()
+    try:
+        page.set_max_import_depth(1)
+        with pytest.raises(exceptions.ImportDepthException):
+            page.load_markdown_contents(template)
+    finally:
+        page.set_max_import_depth(depth)
+
+
+def test_repeated_import_fetched_once(monkeypatch):
+    fetched = []
+
+    def get_shared_markdown(import_name):
+        fetched.append(import_name)
+        return f'shared {import_name}'
+
+    monkeypatch.setattr(page, 'get_shared_markdown', get_shared_markdown)
+    lines = page.process_imports(['top', '[IMPORT A]', 'middle', '[IMPORT A]', '[IMPORT a]', 'end'])
+
+    assert lines == ['top', 'shared A', 'middle', 'shared A', 'shared A', 'end']
+    assert fetched == ['A']
+
+
+def test_compiled_memo_is_bounded():
+    compiled_template.clear()
+    engine.set_compiled_cache(max_entries=4)
+    try:
+        for idx in range(50):
+            compiled_template.get_compiled(f'html: page{idx}', f'<p>$TITLE$ {idx}</p>')
+
+        assert compiled_template.count() == 4
+        latest = compiled_template.get_compiled('html: page49', '<p>$TITLE$ 49</p>')
+        assert compiled_template.get_compiled('html: page49', '<p>$TITLE$ 49</p>') is latest
+
+        with pytest.raises(exceptions.ArgumentExpectedException):
+            engine.set_compiled_cache(max_entries=0)
+    finally:
+        engine.set_compiled_cache()
+        compiled_template.clear()
+
+
+def test_compiled_memo_follows_cache_evictions():
+    original = caching.get_cache()
+    cache = caching.BoundedMemoryCache(max_entries=4)
+    caching.set_cache(cache)
+    compiled_template.clear()
+    try:
+        for idx in range(50):
+            key = f'html: page{idx}'
+            entry = cache.get_or_add_html(key, key, lambda: f'<p>$TITLE$ {idx}</p>')
+            compiled_template.get_compiled(key, entry.contents)
+
+        assert cache.count() == 4
+        assert compiled_template.count() == 4
+
+        compiled_template.clear()
+        caching.set_cache(caching.BoundedMemoryCache(ttl_seconds=0.01))
+        entry = caching.get_cache().add_html('html: page', 'html: page', '<p>$TITLE$</p>')
+        compiled_template.get_compiled('html: page', entry.contents)
+        time.sleep(0.02)
+
+        assert compiled_template.count() == 1
+        assert caching.get_cache().get_html('html: page') is None
+        assert compiled_template.count() == 0
+    finally:
+        caching.set_cache(original)
+        compiled_template.clear()
+
+
+def test_compiled_template_etag():
+    compiled = compiled_template.CompiledTemplate('<p>$TITLE$ and $LINK$</p>')
+    plain = compiled_template.CompiledTemplate('<p>No variables</p>')
+
+    assert compiled.get_etag({}) == compiled.get_etag({'unused': 'U'}) == f'"{compiled.content_hash}"'
+    assert compiled.get_etag({'title': 'A'}) == compiled.get_etag({'TITLE': 'A', 'unused': 'U'})
+    assert compiled.get_etag({'title': 'A'}) != compiled.get_etag({'title': 'B'})
+    assert compiled.get_etag({'title': 'A'}) != compiled.get_etag({'link': 'A'})
+    assert plain.get_etag({'title': 'A'}) == plain.get_etag({})
+
+
+def test_page_with_meta():
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!', 'link': 'https://training.talkpython.fm'}
+    engine.clear_cache()
+
+    meta = engine.get_page_with_meta(template, data)
+    folder = FileStore.get_template_folder()
+    newest = max(
+        os.path.getmtime(os.path.join(folder, 'home', 'replacements_import.md')),
+        os.path.getmtime(os.path.join(folder, '_shared', 'replacements.md')))
+
+    assert meta.html == engine.get_page(template, data)
+    # datetime keeps microseconds, file times can have nanoseconds.
+    assert abs(meta.last_modified.timestamp() - newest) < 1e-5
+    assert meta.last_modified.tzinfo is not None
+    assert engine.get_page_meta(template, data) == meta._replace(html=None)
+    assert engine.get_page_meta(template, {'title': 'Other'}).etag != meta.etag
+
+
+def test_page_compressed():
+    import gzip
+    import zlib
+
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!'}
+    html = engine.get_page(template, data)
+
+    assert gzip.decompress(engine.get_page(template, data, encoding='gzip')) == html.encode('utf-8')
+    assert zlib.decompress(engine.get_page(template, {}, encoding='deflate')) == \
+        engine.get_page(template, {}).encode('utf-8')
+
+    with pytest.raises(exceptions.InvalidOperationException):
+        engine.get_page(template, {}, encoding='br')
+
+
+def test_compressed_variant_is_reused():
+    compiled = compiled_template.CompiledTemplate('<p>$TITLE$</p>')
+
+    static = compiled.render_compressed({'unused': 'U'}, 'gzip')
+    assert compiled.render_compressed({}, 'gzip') is static
+    assert compiled.render_compressed({'title': 'T'}, 'gzip') is not static
+
+
+@pytest.fixture
+def output_cache():
+    engine.set_output_cache(True, max_entries=2)
+    engine.reset_stats()
+
+    yield
+
+    engine.set_output_cache(False)
+
+
+def test_output_cache_reuses_output(output_cache):
+    template = os.path.join('home', 'replacements_import.md')
+
+    first = engine.get_page(template, {'title': 'A'})
+    assert engine.get_page(template, {'TITLE': 'A', 'unused': 'U'}) is first
+    assert engine.get_page(template, {'title': 'B'}) is not first
+    engine.get_page(template, {})
+
+    stats = engine.get_stats()
+    assert stats['counters']['output_cache.hits'] == 1
+    assert stats['counters']['output_cache.misses'] == 2
+    assert stats['output_cache']['count'] == 2
+
+
+def test_output_cache_evicts_least_recently_used(output_cache):
+    template = os.path.join('home', 'replacements_import.md')
+
+    a = engine.get_page(template, {'title': 'A'})
+    engine.get_page(template, {'title': 'B'})
+    assert engine.get_page(template, {'title': 'A'}) is a
+    engine.get_page(template, {'title': 'C'})
+
+    assert engine.get_page(template, {'title': 'A'}) is a
+    assert engine.get_stats()['counters']['output_cache.misses'] == 3
+
+    engine.get_page(template, {'title': 'B'})
+    assert engine.get_stats()['counters']['output_cache.misses'] == 4
+
+
+def test_output_cache_exclude_and_invalidate(output_cache):
+    template = os.path.join('home', 'replacements_import.md')
+
+    engine.exclude_from_output_cache(template)
+    engine.get_page(template, {'title': 'A'})
+    assert engine.get_stats()['output_cache']['count'] == 0
+
+    engine.exclude_from_output_cache(template, excluded=False)
+    first = engine.get_page(template, {'title': 'A'})
+    page.invalidate_page(template)
+
+    assert engine.get_stats()['output_cache']['count'] == 0
+    assert engine.get_page(template, {'title': 'A'}) == first
+
+
+def test_page_bytes():
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!', 'link': 'https://training.talkpython.fm'}
+    html = engine.get_page(template, data)
+
+    assert engine.get_page_bytes(template, data) == html.encode('utf-8')
+    assert b''.join(engine.get_page_bytes(template, data, buffers=True)) == html.encode('utf-8')
+    assert engine.get_page_bytes(template, {}) == engine.get_page(template, {}).encode('utf-8')
+
+
+def test_compiled_template_reuses_encoded_parts():
+    compiled = compiled_template.CompiledTemplate('<p>Größe $TITLE$</p>')
+
+    first = compiled.render_buffers({'title': 'Ä'})
+    second = compiled.render_buffers({'title': 'B'})
+
+    assert first == ['<p>Größe '.encode('utf-8'), 'Ä'.encode('utf-8'), b'</p>']
+    assert first[0] is second[0]
+    assert compiled.render_bytes({}) is compiled.render_bytes({'unused': 'U'})
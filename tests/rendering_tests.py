@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+from markdown_subtemplate import engine, rendering
+from markdown_subtemplate import exceptions
+from markdown_subtemplate.bench import renderers as renderer_bench
+from markdown_subtemplate.infrastructure import markdown_transformer
+from markdown_subtemplate.rendering import MarkdownRenderer, Markdown2Renderer
+from markdown_subtemplate.storage.file_storage import FileStore
+
+template_folder = os.path.join(os.path.dirname(__file__), 'templates')
+FileStore.set_template_folder(template_folder)
+
+
+class UpperRenderer(MarkdownRenderer):
+    name = 'upper'
+
+    def render(self, text: str, safe_mode: bool) -> str:
+        return f'<p>{text.upper()}</p>\n'
+
+
+@pytest.fixture
+def upper_renderer():
+    original = rendering.get_renderer()
+    rendering.set_renderer(UpperRenderer())
+    engine.clear_cache()
+
+    yield
+
+    rendering.set_renderer(original)
+    engine.clear_cache()
+
+
+def test_default_renderer_is_markdown2():
+    assert isinstance(rendering.get_renderer(), Markdown2Renderer)
+
+
+def test_set_renderer_requires_renderer():
+    with pytest.raises(exceptions.ArgumentExpectedException):
+        # noinspection PyTypeChecker
+        rendering.set_renderer(object())
+
+
+def test_transform_uses_renderer(upper_renderer):
+    html = engine.get_page(os.path.join('home', 'basic_markdown.md'))
+
+    assert html.startswith('<p># THIS IS THE BASIC TITLE')
+    assert markdown_transformer.transform('# a') == '<p># A</p>\n'
+
+
+def test_renderers_do_not_share_cached_html(upper_renderer):
+    assert markdown_transformer.transform('*a*') == '<p>*A*</p>\n'
+
+    rendering.set_renderer(Markdown2Renderer())
+    assert markdown_transformer.transform('*a*') == '<p><em>a</em></p>\n'
+
+
+def test_normalize_html_ignores_formatting():
+    assert renderer_bench.normalize_html('<p>a\n  b</p>\n\n<hr class="x" id="y"/>') == \
+        renderer_bench.normalize_html('<p>a b</p><hr id="y" class="x">')
+
+
+def test_compare_renderers():
+    documents = renderer_bench.load_documents(template_folder)
+    results = renderer_bench.compare_renderers(documents, [Markdown2Renderer(), UpperRenderer()], repeat=1)
+
+    assert os.path.join('home', 'basic_markdown.md') in documents
+    assert [r.name for r in results] == ['markdown2', 'upper']
+    assert results[0].mismatches == []
+    assert len(results[1].mismatches) == len(documents)
+
+
+fragment_document = """# Title
+
+Some *text*
+on two lines.
+
+* one
+* two
+
+* loose item
+
+    indented continuation
+
+> quote
+
+> more quote
+
+```python
+x = 1
+
+y = 2
+```
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+The end."""
+
+
+@pytest.fixture
+def fragments():
+    engine.set_fragment_cache(True)
+    engine.clear_cache()
+
+    yield
+
+    engine.set_fragment_cache(False)
+    engine.clear_cache()
+
+
+def test_split_blocks_keeps_blocks_whole():
+    blocks = markdown_transformer.split_blocks(fragment_document)
+
+    assert blocks[0] == '# Title'
+    assert blocks[2] == '* one\n* two\n\n* loose item\n\n    indented continuation'
+    assert blocks[3] == '> quote\n\n> more quote'
+    assert blocks[4] == '```python\nx = 1\n\ny = 2\n```'
+    assert len(blocks) == 7
+
+
+def test_split_blocks_whole_document_constructs():
+    assert markdown_transformer.split_blocks('A [link][1].\n\n[1]: https://example.com') is None
+    assert markdown_transformer.split_blocks('<div>\n\ntext\n\n</div>') is None
+
+
+def test_fragments_match_whole_document(fragments):
+    documents = renderer_bench.load_documents(template_folder)
+    documents['fragment_document'] = fragment_document
+    documents['blank_line_runs'] = 'text\n\n    code1\n\n\n    code2\n\nafter'
+
+    for text in documents.values():
+        assert markdown_transformer.transform(text, False) == markdown_transformer.render(text, False)
+
+
+def test_fragments_render_changed_blocks_only(fragments):
+    engine.reset_stats()
+    markdown_transformer.transform(fragment_document + '\n\nFirst ending.')
+    markdown_transformer.transform(fragment_document + '\n\nSecond ending.')
+
+    counters = engine.get_stats()['counters']
+    assert counters['fragment_cache.misses'] == 9
+    assert counters['fragment_cache.hits'] == 7
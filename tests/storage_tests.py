@@ -0,0 +1,77 @@
+import os
+import time
+
+import pytest
+
+from markdown_subtemplate import engine
+from markdown_subtemplate import exceptions
+from markdown_subtemplate.storage.file_storage import FileStore
+
+
+@pytest.fixture
+def indexed_folder(tmp_path):
+    os.makedirs(os.path.join(str(tmp_path), '_shared'))
+    os.makedirs(os.path.join(str(tmp_path), 'Home'))
+    write(str(tmp_path), os.path.join('Home', 'Index.md'), '# Title\n\n[IMPORT FOOTER]')
+    write(str(tmp_path), os.path.join('_shared', 'footer.md'), 'The footer')
+
+    original_folder = FileStore.get_template_folder()
+    FileStore.set_template_folder(str(tmp_path))
+    FileStore.enable_index()
+    engine.clear_cache()
+
+    yield str(tmp_path)
+
+    FileStore.disable_index()
+    engine.clear_cache()
+    if original_folder:
+        FileStore.set_template_folder(original_folder)
+    else:
+        FileStore().clear_settings()
+
+
+def write(folder, path, text):
+    with open(os.path.join(folder, path), 'w', encoding='utf-8') as fout:
+        fout.write(text)
+
+
+def test_index_lookups(indexed_folder):
+    store = FileStore()
+
+    assert FileStore.is_index_enabled()
+    assert store.get_markdown_text(os.path.join('home', 'index.md')).startswith('# Title')
+    assert store.get_shared_markdown('FOOTER') == 'The footer'
+    assert store.get_markdown_stamp(os.path.join('home', 'index.md'))
+    assert store.get_shared_stamp('missing') is None
+    assert '<p>The footer</p>' in engine.get_page(os.path.join('home', 'index.md'))
+
+
+def test_index_missing_template_skips_disk(indexed_folder, monkeypatch):
+    def fail(*args):
+        raise AssertionError("The file system was probed.")
+
+    monkeypatch.setattr(os.path, 'exists', fail)
+    monkeypatch.setattr(os, 'stat', fail)
+
+    with pytest.raises(exceptions.TemplateNotFoundException):
+        FileStore().get_markdown_text(os.path.join('home', 'missing.md'))
+    assert FileStore().get_markdown_stamp(os.path.join('home', 'missing.md')) is None
+
+
+def test_index_refresh(indexed_folder):
+    write(indexed_folder, os.path.join('Home', 'new.md'), 'New page')
+
+    with pytest.raises(exceptions.TemplateNotFoundException):
+        FileStore().get_markdown_text(os.path.join('home', 'new.md'))
+
+    assert FileStore.refresh_index() == 3
+    assert FileStore().get_markdown_text(os.path.join('home', 'new.md')) == 'New page'
+
+
+def test_index_refreshes_on_timer(indexed_folder):
+    FileStore.enable_index(refresh_seconds=0.001)
+    write(indexed_folder, os.path.join('Home', 'new.md'), 'New page')
+
+    time.sleep(0.01)
+
+    assert FileStore().get_markdown_text(os.path.join('home', 'new.md')) == 'New page'
@@ -0,0 +1,70 @@
+import os
+
+from markdown_subtemplate import engine, caching, rendering
+from markdown_subtemplate.storage.file_storage import FileStore
+
+FileStore.set_template_folder(
+    os.path.join(os.path.dirname(__file__), 'templates'))
+
+
+def test_template_paths():
+    paths = FileStore().get_template_paths()
+
+    assert os.path.join('home', 'basic_markdown.md') in paths
+    assert os.path.join('_shared', 'basic_import.md') in paths
+    assert os.path.join('_shared', 'basic_import.md') not in FileStore().get_template_paths(include_shared=False)
+
+
+def test_warm_up_in_process():
+    engine.clear_cache()
+    result = engine.warm_up(workers=1)
+
+    template = os.path.join('home', 'variables.md')
+    cached = caching.get_cache().get_html(f'html: {template}')
+
+    # The import cycle test templates cannot be rendered.
+    assert set(result.errors) == {
+        os.path.join('home', 'import_cycle.md'),
+        os.path.join('home', 'import_missing.md'),
+    }
+    assert result.pages == len(FileStore().get_template_paths(include_shared=False)) - 2
+    assert cached is not None
+    # Shared imports are only rendered inside the pages that import them.
+    assert caching.get_cache().get_html(f"html: {os.path.join('_shared', 'basic_import.md')}") is None
+    assert '<h3>This page had a title set: Variables rule!</h3>' in cached.contents
+
+
+def test_warm_up_process_pool_matches_render():
+    template = os.path.join('home', 'replacements_import.md')
+    data = {'Title': 'Best Title Ever!', 'link': 'https://training.talkpython.fm'}
+
+    engine.clear_cache()
+    expected = engine.get_page(template, data)
+
+    engine.clear_cache()
+    engine.warm_up(workers=2)
+    count = caching.get_cache().count()
+
+    assert engine.get_page(template, data) == expected
+    assert caching.get_cache().count() == count
+
+
+def test_warm_up_renders_in_process_when_renderer_cannot_be_pickled():
+    class LocalRenderer(rendering.Markdown2Renderer):
+        name = 'local'
+
+        def render(self, text: str, safe_mode: bool) -> str:
+            return '<!-- local -->' + super().render(text, safe_mode)
+
+    template = os.path.join('home', 'basic_markdown.md')
+    engine.clear_cache()
+    rendering.set_renderer(LocalRenderer())
+    try:
+        result = engine.warm_up(workers=2)
+        cached = caching.get_cache().get_html(f'html: {template}')
+    finally:
+        rendering.set_renderer(rendering.Markdown2Renderer())
+        engine.clear_cache()
+
+    assert result.pages == len(FileStore().get_template_paths(include_shared=False)) - 2
+    assert cached.contents.startswith('<!-- local -->')